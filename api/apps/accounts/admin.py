@@ -87,6 +87,9 @@ class AccountAdmin(admin.ModelAdmin):
                 "created_date",
                 "last_order_end_date",
                 "last_deal_end_date",
+                "history_backfilled_until",
+                "next_sync_at",
+                "sync_interval",
                 "broker",  # Add broker field
                 "timezone",  # Add timezone field
             )
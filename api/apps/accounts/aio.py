@@ -0,0 +1,119 @@
+"""Asyncio client for the ``Account`` MT5 methods.
+
+The mt5linux RPC calls are blocking, so each call runs on a thread of a shared executor while the event loop
+awaits it. The MT5 login is terminal wide, so the calls of one terminal run one at a time behind a semaphore while
+calls to different terminals run concurrently, each within a timeout: many accounts can be synced or queried
+from one event loop without a thread per account waiting on the pool.
+
+A call that times out stops being awaited but its thread still runs until the terminal answers, its pooled
+session is only checked back in then.
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .exceptions import TerminalTimeout
+from .pool import get_session_pool
+
+logger = getLogger(__name__)
+
+# The MT5 surface of Account exposed as coroutines
+ACCOUNT_METHODS = (
+    "account_info", "symbols_get", "symbol_info", "symbol_info_tick",
+    "copy_rates_from", "copy_rates_from_pos", "copy_rates_range", "copy_ticks_from", "copy_ticks_range",
+    "orders_get", "positions_get", "history_orders_get", "history_deals_get",
+)
+
+
+def _in_thread(function, *args, **kwargs):
+    try:
+        return function(*args, **kwargs)
+    finally:
+        # Executor threads outlive the call, do not leave their database connection open
+        close_old_connections()
+
+
+class AsyncMT5:
+    """Runs blocking MT5 work for many accounts concurrently on one event loop.
+
+    Every name of ACCOUNT_METHODS is available as a coroutine taking the account first, for example
+    ``await client.symbol_info(account, "EURUSD")``.
+
+    Keyword Args:
+        concurrency (int): Calls in flight per terminal, 1 by default since a terminal is logged into one account
+            at a time. More only queues the calls on the session pool.
+        timeout (float): Seconds a call may take, MT5_CALL_TIMEOUT by default.
+        executor (ThreadPoolExecutor): Executor the blocking calls run on, a shared one by default.
+    """
+
+    def __init__(self, concurrency: int = None, timeout: float = None, executor: ThreadPoolExecutor = None):
+        self.concurrency = concurrency or 1
+        self.timeout = timeout or settings.MT5_CALL_TIMEOUT
+        self.executor = executor or get_executor()
+        # asyncio primitives belong to one event loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, terminal: tuple) -> asyncio.Semaphore:
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if terminal not in semaphores:
+            semaphores[terminal] = asyncio.Semaphore(self.concurrency)
+        return semaphores[terminal]
+
+    async def run(self, account, function, *args, timeout: float = None, **kwargs):
+        """Run a blocking ``function`` using the terminal of ``account``, within the terminal concurrency.
+
+        Args:
+            account (Account): The account whose terminal the function talks to
+            function (callable): The blocking function
+            *args: The function arguments
+
+        Keyword Args:
+            timeout (float): Seconds the call may take, the client timeout by default
+            **kwargs: The function keyword arguments
+
+        Raises:
+            TerminalTimeout: The call did not finish in time
+        """
+        terminal = get_session_pool().terminal_for(account)
+        timeout = timeout or self.timeout
+        async with self._semaphore(terminal):
+            call = partial(_in_thread, function, *args, **kwargs)
+            try:
+                return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(self.executor, call),
+                                              timeout)
+            except asyncio.TimeoutError:
+                raise TerminalTimeout("MT5 call {} of account {} timed out after {}s".format(
+                    getattr(function, "__name__", function), account.id, timeout))
+
+    def __getattr__(self, name):
+        if name not in ACCOUNT_METHODS:
+            raise AttributeError(name)
+
+        async def _method(account, *args, **kwargs):
+            return await self.run(account, getattr(account, name), *args, **kwargs)
+        _method.__name__ = name
+        return _method
+
+
+_executor = None
+_client = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.MT5_ASYNC_WORKERS, thread_name_prefix="mt5")
+    return _executor
+
+
+def get_client() -> AsyncMT5:
+    global _client
+    if _client is None:
+        _client = AsyncMT5()
+    return _client
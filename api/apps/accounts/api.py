@@ -17,7 +17,7 @@ from apps.users import services as users_services
 from rest_framework.response import Response
 from django.apps import apps
 from rest_framework import status
-from apps.utils.exceptions import NotEnoughSlotsForAccount, WrongArguments, Blocked
+from apps.utils.exceptions import NotEnoughSlotsForAccount, WrongArguments, Blocked, GatewayTimeout
 from .permissions import IsAccountAdmin, HasAccountPerm, CanLeaveAccount
 from . import filters as account_filters
 from django.utils import timezone
@@ -25,6 +25,12 @@ from .choices import ANON_PERMISSIONS
 from easy_thumbnails.source_generators import pil_image
 from apps.notifications.choices import NotifyLevel
 from . import services
+from . import scheduler as account_scheduler
+from . import tasks as account_tasks
+from .aio import get_client as mt5_client
+from .exceptions import TerminalTimeout
+from .snapshot import AccountSnapshot
+from asgiref.sync import async_to_sync
 from rest_framework.filters import SearchFilter, OrderingFilter
 from .filters import BrokerFilter
 from django_filters.rest_framework import DjangoFilterBackend
@@ -32,12 +38,15 @@ from apps.attachments.models import Attachment
 from django.conf import settings
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from apps.utils.pagination import CustomPagination
+from apps.utils.pagination import CustomPagination, KeysetPagination
 import pytz
 from apps.users.filters import CanViewAccountFilterBackend
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from apps.journals.models import HistoryOrders, HistoryDeals, Orders, Positions
+from apps.journals import stats as journals_stats
+from apps.journals import rollups as journals_rollups
+from apps.journals import analytics as journals_analytics
 from . import mt5
 from django.core.exceptions import ValidationError
 
@@ -87,6 +96,7 @@ class AccountViewset(viewsets.ModelViewSet):
             or self.action == "events" \
             or self.action == "orders_get" \
             or self.action == "stats" \
+            or self.action == "analytics" \
             or self.action == "by_slug":
             self.permission_classes = (HasAccountPerm("view_account"),)
         elif self.action == "update" \
@@ -95,6 +105,7 @@ class AccountViewset(viewsets.ModelViewSet):
             or self.action == "partial" \
             or self.action == "upload_data" \
             or self.action == "create_trades" \
+            or self.action == "sync_now" \
             or self.action == "destroy":
             self.permission_classes = (IsAccountAdmin(),)
         elif self.action == "leave":
@@ -241,10 +252,14 @@ class AccountViewset(viewsets.ModelViewSet):
         data = serializer.data
         broker = get_object_or_404(Broker, id=data.get('broker', None))
 
+        timezone_changed = self.object.timezone != data.get('timezone')
         self.object.timezone = data.get('timezone')
         self.object.broker = broker
         self.object.save(update_fields=["broker", "timezone",])
 
+        if timezone_changed:
+            journals_rollups.rebuild(self.object.id, self.object.timezone)
+
         return Response(status=status.HTTP_201_CREATED)
 
 
@@ -371,7 +386,10 @@ class AccountViewset(viewsets.ModelViewSet):
     def symbol_info(self, request, *args, **kwargs):
         instance = self.get_object()
         symbol = request.query_params.get('symbol', '')
-        symbol_info = instance.symbol_info(symbol)
+        try:
+            symbol_info = async_to_sync(mt5_client().symbol_info)(instance, symbol)
+        except TerminalTimeout as e:
+            raise GatewayTimeout(str(e))
         # Serialize the 'symbol_info' to return as a response
         # You might need to create a serializer for the symbol info data
         return Response(symbol_info._asdict(), status=status.HTTP_200_OK)
@@ -383,16 +401,11 @@ class AccountViewset(viewsets.ModelViewSet):
         ticket = request.GET.get('ticket', '')
         symbol = request.GET.get('symbol', '')
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('symbol', symbol)) if value}
-        orders = Orders.objects(account=instance.id, **kwargs).order_by('-time_setup')
-        paginator = CustomPagination()
-        result_page = paginator.paginate_queryset(orders, request)                
+        orders = Orders.objects(account=instance.id, **kwargs).only(*serializers.OrdersSerializer.projection).as_pymongo()
+        paginator = KeysetPagination(ordering=('-time_setup', '-ticket'))
+        result_page = paginator.paginate_queryset(orders, request)
         serialized_orders = serializers.OrdersSerializer(result_page, many=True).data
-        paginated_response = {
-            'count': paginator.page.paginator.count,
-            'next': paginator.get_next_link(),
-            'previous': paginator.get_previous_link(),
-            'results': serialized_orders
-        }
+        paginated_response = paginator.get_paginated_data(serialized_orders)
         return Response(paginated_response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['GET'])
@@ -402,16 +415,11 @@ class AccountViewset(viewsets.ModelViewSet):
         ticket = request.GET.get('ticket', '')
         symbol = request.GET.get('symbol', '')
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('symbol', symbol)) if value}
-        positions = Positions.objects(account=instance.id, **kwargs).order_by('-time')
-        paginator = CustomPagination()
-        result_page = paginator.paginate_queryset(positions, request)                
+        positions = Positions.objects(account=instance.id, **kwargs).only(*serializers.TradePositionSerializer.projection).as_pymongo()
+        paginator = KeysetPagination(ordering=('-time', '-ticket'))
+        result_page = paginator.paginate_queryset(positions, request)
         serialized_positions = serializers.TradePositionSerializer(result_page, many=True).data
-        paginated_response = {
-            'count': paginator.page.paginator.count,
-            'next': paginator.get_next_link(),
-            'previous': paginator.get_previous_link(),
-            'results': serialized_positions
-        }
+        paginated_response = paginator.get_paginated_data(serialized_positions)
         return Response(paginated_response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['GET'])
@@ -427,18 +435,13 @@ class AccountViewset(viewsets.ModelViewSet):
         date_from = int(datetime.strptime(date_from, date_format).timestamp())
         date_to = int(datetime.strptime(date_to, date_format).timestamp())
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('position', position)) if value}
-        result = HistoryOrders.objects(account=instance.id, time_setup__gte=date_from, time_setup__lte=date_to, **kwargs).order_by('-time_setup')
+        result = HistoryOrders.objects(account=instance.id, time_setup__gte=date_from, time_setup__lte=date_to, **kwargs).only(*serializers.OrdersSerializer.projection).as_pymongo()
         if state:
             result = result.filter(state__in=state)
-        paginator = CustomPagination()
-        result_page = paginator.paginate_queryset(result, request)                
+        paginator = KeysetPagination(ordering=('-time_setup', '-ticket'))
+        result_page = paginator.paginate_queryset(result, request)
         serialized_history_orders = serializers.OrdersSerializer(result_page, many=True).data
-        paginated_response = {
-            'count': paginator.page.paginator.count,
-            'next': paginator.get_next_link(),
-            'previous': paginator.get_previous_link(),
-            'results': serialized_history_orders
-        }
+        paginated_response = paginator.get_paginated_data(serialized_history_orders)
         return Response(paginated_response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['GET'])
@@ -455,20 +458,15 @@ class AccountViewset(viewsets.ModelViewSet):
         date_from = int(datetime.strptime(date_from, date_format).timestamp())
         date_to = int(datetime.strptime(date_to, date_format).timestamp())
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('position', position)) if value}
-        result = HistoryDeals.objects(account=instance.id, time__gte=date_from, time__lte=date_to, **kwargs).order_by('-time')
+        result = HistoryDeals.objects(account=instance.id, time__gte=date_from, time__lte=date_to, **kwargs).only(*serializers.HistoryDealsSerializer.projection).as_pymongo()
         if deal_type:
             result = result.filter(type__in=deal_type)
         if entry:
             result = result.filter(entry__in=entry)
-        paginator = CustomPagination()
+        paginator = KeysetPagination(ordering=('-time', '-ticket'))
         page = paginator.paginate_queryset(result, request)
         serialized_history_deals = serializers.HistoryDealsSerializer(page, many=True).data
-        paginated_response = {
-            'count': paginator.page.paginator.count,
-            'next': paginator.get_next_link(),
-            'previous': paginator.get_previous_link(),
-            'results': serialized_history_deals
-        }
+        paginated_response = paginator.get_paginated_data(serialized_history_deals)
         return Response(paginated_response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['GET'])
@@ -479,45 +477,18 @@ class AccountViewset(viewsets.ModelViewSet):
         date_format = "%Y-%m-%dT%H:%M:%SZ"
         date_from = int(datetime.strptime(date_from, date_format).timestamp())
         date_to = int(datetime.strptime(date_to, date_format).timestamp())
-        deals = HistoryDeals.objects(account=instance.id, time__gte=date_from, time__lte=date_to).order_by('-time')
-        positions = Positions.objects(account=instance.id)
-
-        pipeline = [
-            {"$group": {
-                "_id": "$symbol",
-                "trade_allocation_amounts": {"$sum": {"$multiply": ["$volume", "$price"]}}
-            }}
-        ]
-        aggregated_data = deals.aggregate(*pipeline)
-
-        trade_allocation_amounts = []
-        trade_allocation_categories = []
-
-        for data in aggregated_data:
-            if data['_id']:
-                trade_allocation_categories.append(data['_id'])
-                trade_allocation_amounts.append(data['trade_allocation_amounts'])
-
-        daily_cumulative_pl = defaultdict(float)
-        for deal in deals.filter(entry=1):
-            deal_date = datetime.utcfromtimestamp(deal.time).date()
-            daily_cumulative_pl[deal_date] += deal.profit
-
-        # Convert the daily cumulative profit and loss dictionary into a list of dicts
-        net_profit_loss_data = [pl for date, pl in daily_cumulative_pl.items()]
-        net_profit_loss_labels = [date for date, pl in daily_cumulative_pl.items()]
-
-        response = {
-            'total_trades': deals.filter(entry=1).count() + positions.filter().count(),
-            'total_winning_trades': deals.filter(entry=1, profit__gte=0).count() + positions.filter(profit__gte=0).count(),
-            'total_lossing_trades': deals.filter(entry=1, profit__lt=0).count() + positions.filter(profit__lt=0).count(),
-            'net_profit': sum(deal.profit for deal in deals.filter(entry=1, profit__gte=0)) + sum(position.profit for position in positions.filter(profit__gte=0)),
-            'net_loss': sum(deal.profit for deal in deals.filter(entry=1, profit__lt=0)) + sum(position.profit for position in positions.filter(profit__lt=0)),
-            'net_profit_loss_data': net_profit_loss_data,
-            'net_profit_loss_labels': net_profit_loss_labels,
-            'trade_allocation_amounts': trade_allocation_amounts,
-            'trade_allocation_categories': trade_allocation_categories
-        }
+        response = journals_stats.account_stats(instance.id, date_from, date_to, instance.timezone)
+        return Response(response, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['GET'])
+    def analytics(self, request, *args, **kwargs):
+        instance = self.get_object()
+        date_from = request.GET.get('date_from', instance.start_date.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        date_to = request.GET.get('date_to', instance.end_date.strftime("%Y-%m-%dT%H:%M:%SZ"))
+        date_format = "%Y-%m-%dT%H:%M:%SZ"
+        date_from = int(datetime.strptime(date_from, date_format).timestamp())
+        date_to = int(datetime.strptime(date_to, date_format).timestamp())
+        response = journals_analytics.account_analytics(instance.id, date_from, date_to, instance.balance)
         return Response(response, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['GET'])
@@ -533,6 +504,15 @@ class AccountViewset(viewsets.ModelViewSet):
         }]
         return Response(response, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['POST'])
+    def sync_now(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if instance.account_type != 'AUTO' or not instance.has_be_configured:
+            raise WrongArguments(_("Only configured AUTO accounts are synced with MT5"))
+        account_scheduler.nudge(instance)
+        account_tasks.sync_account.delay(instance.id)
+        return Response(status=status.HTTP_202_ACCEPTED)
+
     @action(detail=True, methods=['POST'])
     def create_trades(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -541,45 +521,11 @@ class AccountViewset(viewsets.ModelViewSet):
         if not serializer.is_valid():
             raise WrongArguments(serializer.errors)
 
-        history_deals = serializer.data.get("history_deals", [])
-        for history_deal in history_deals:           
-            result = HistoryDeals.objects(account=instance.id, ticket=history_deal['ticket']).first()
-            if result:
-                print("updating history deal")   
-                result.update(**history_deal)
-            else:
-                print("creating history deal")   
-                history_deal['account'] = instance.id
-                new_deal = HistoryDeals(**history_deal)
-                new_deal.save()
-
-        history_orders = serializer.data.get("history_orders", [])
-        for history_order in history_orders:           
-            result = HistoryOrders.objects(account=instance.id, ticket=history_order['ticket']).first()
-            if result:
-                print("updating history order")   
-                result.update(**history_order)
-            else:
-                print("creating history order")   
-                history_order['account'] = instance.id
-                new_order = HistoryOrders(**history_order)
-                new_order.save()
-
-        positions = serializer.data.get("positions", [])
-        Positions.objects(account=instance.id).delete()
-        for position in positions:           
-            print("creating position")   
-            position['account'] = instance.id
-            new_position = Positions(**position)
-            new_position.save()
-
-        orders = serializer.data.get("orders", [])
-        Orders.objects(account=instance.id).delete()
-        for order in orders:           
-            print("creating order")   
-            order['account'] = instance.id
-            new_order = Orders(**order)
-            new_order.save()
+        snapshot = AccountSnapshot(history_deals=serializer.data.get("history_deals", []),
+                                   history_orders=serializer.data.get("history_orders", []),
+                                   positions=serializer.data.get("positions", []),
+                                   orders=serializer.data.get("orders", []))
+        snapshot.store(instance.id, instance.timezone)
 
         return Response(status=status.HTTP_200_OK)
 
@@ -0,0 +1,380 @@
+"""Local store of closed MT5 bars in front of the ``copy_rates_*`` calls.
+
+Closed bars never change, so they are kept on local disk per ``(server, symbol, timeframe)``: NumPy ``.npy``
+partitions of PARTITION_BARS bars each, plus the list of the time intervals already fetched. An interval is
+fetched once and then served from the partitions, only the gaps and the still open bar go to the terminal.
+The terminal returns the history it has synced so far, so only the span between the first and the last bar it
+returned counts as fetched: times it returned no bars for are asked again next time.
+
+The cache is local to each host: every process evicts it after writing, at most every
+MT5_BAR_CACHE_EVICT_INTERVAL seconds per host.
+
+Bar times are in trade server time, like the terminal clock the open bar is told from, the time of the last tick
+of the symbol. Weekly and monthly bars are not aligned on their length and are always fetched from the terminal.
+"""
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from logging import getLogger
+
+import numpy as np
+from django.conf import settings
+
+from .mt5 import TimeFrame
+
+logger = getLogger(__name__)
+
+PARTITION_BARS = 100000
+COVERAGE_FILE = "coverage.json"
+LOCK_FILE = ".lock"
+EVICTION_FILE = ".evicted"
+RATES_DTYPE = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                        ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+
+
+def _timestamp(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", str(name)) or "_"
+
+
+def _merge(intervals: list) -> list:
+    """Sorted, non overlapping ``[start, end)`` intervals covering the same times."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+@contextmanager
+def _locked(path: str):
+    """Exclusive lock of the store at ``path``, between threads and processes."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _clear(path: str):
+    """Delete the bars of the store at ``path`` under its lock, its coverage first, keeping the lock file."""
+    with _locked(path):
+        for name in [COVERAGE_FILE] + sorted(os.listdir(path)):
+            if name != LOCK_FILE:
+                try:
+                    os.remove(os.path.join(path, name))
+                except FileNotFoundError:
+                    pass
+
+
+def cacheable(timeframe) -> bool:
+    """Whether the bars of ``timeframe`` are aligned on its length, up to D1."""
+    return TimeFrame(timeframe).time <= TimeFrame.D1.time
+
+
+class BarStore:
+    """The stored closed bars of one server, symbol and timeframe.
+
+    Args:
+        root (str): The cache directory
+        server (str): The trade server
+        symbol (str): The symbol
+        timeframe (TimeFrame | int): The timeframe
+    """
+
+    def __init__(self, root: str, server: str, symbol: str, timeframe):
+        self.timeframe = TimeFrame(timeframe)
+        self.seconds = self.timeframe.time
+        self.span = PARTITION_BARS * self.seconds
+        self.path = os.path.join(root, _safe(server), _safe(symbol), self.timeframe.name)
+
+    def __repr__(self):
+        return "<BarStore {}>".format(self.path)
+
+    def lock(self):
+        """Exclusive lock of the store, between threads and processes."""
+        return _locked(self.path)
+
+    def _partition(self, partition: int) -> str:
+        return os.path.join(self.path, "{}.npy".format(partition))
+
+    def coverage(self) -> list:
+        """The ``[start, end)`` bar time intervals stored, every bar of the server in them is in the store."""
+        try:
+            with open(os.path.join(self.path, COVERAGE_FILE)) as coverage_file:
+                return json.load(coverage_file)
+        except FileNotFoundError:
+            return []
+
+    def missing(self, start: int, end: int) -> list:
+        """The ``[start, end)`` intervals of bar times not stored yet."""
+        gaps = []
+        for covered_start, covered_end in self.coverage():
+            if covered_end <= start:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > start:
+                gaps.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((start, end))
+        return gaps
+
+    def covering(self, time: int):
+        """The stored interval ending at or after ``time`` and starting before it, None when there is none."""
+        for covered_start, covered_end in reversed(self.coverage()):
+            if covered_start < time:
+                return covered_start, covered_end
+        return None
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """The stored bars with a time in ``[start, end)``."""
+        chunks = []
+        for partition in range(start // self.span, (end - 1) // self.span + 1):
+            try:
+                bars = np.load(self._partition(partition), mmap_mode="r")
+            except FileNotFoundError:
+                continue
+            times = bars["time"]
+            chunks.append(bars[np.searchsorted(times, start):np.searchsorted(times, end)])
+        if os.path.exists(self.path):
+            # The access time drives the eviction
+            os.utime(self.path)
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=RATES_DTYPE)
+
+    def write(self, rates: np.ndarray, start: int, end: int):
+        """Store ``rates``, all the bars of the ``[start, end)`` interval."""
+        rates = rates[(rates["time"] >= start) & (rates["time"] < end)]
+        with self.lock():
+            partitions = rates["time"] // self.span
+            for partition in np.unique(partitions):
+                path = self._partition(int(partition))
+                new = rates[partitions == partition]
+                if os.path.exists(path):
+                    # The new bars replace the stored ones of the same time
+                    bars = np.concatenate((new, np.load(path).astype(new.dtype)))
+                    _, first = np.unique(bars["time"], return_index=True)
+                    new = bars[first]
+                temporary = path + ".tmp.npy"
+                np.save(temporary, np.sort(new, order="time"))
+                os.replace(temporary, path)
+
+            coverage = _merge(self.coverage() + [[int(start), int(end)]])
+            temporary = os.path.join(self.path, COVERAGE_FILE + ".tmp")
+            with open(temporary, "w") as coverage_file:
+                json.dump(coverage, coverage_file)
+            os.replace(temporary, os.path.join(self.path, COVERAGE_FILE))
+
+
+class BarCache:
+    """Serves the ``copy_rates_*`` calls from the bar stores, fetching only what is missing.
+
+    The ``fetch`` callables take unix timestamps and return the terminal rates array or None, which is returned as
+    is. ``server_now`` returns the current trade server time, it is only called for cacheable timeframes.
+
+    Keyword Args:
+        root (str): The cache directory, MT5_BAR_CACHE_DIR by default.
+        enabled (bool): Whether to cache at all, MT5_BAR_CACHE by default.
+    """
+
+    def __init__(self, root: str = None, enabled: bool = None):
+        self.root = root or settings.MT5_BAR_CACHE_DIR
+        self.enabled = settings.MT5_BAR_CACHE if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._counters[name] += count
+
+    def stats(self) -> dict:
+        """Snapshot of the cache counters: hits, partial hits, misses and bars served from the stores or fetched."""
+        with self._lock:
+            stats = dict(self._counters)
+        requests = stats.get("hits", 0) + stats.get("partial_hits", 0) + stats.get("misses", 0)
+        stats["hit_ratio"] = stats.get("hits", 0) / requests if requests else 0
+        return stats
+
+    def store(self, server: str, symbol: str, timeframe) -> BarStore:
+        return BarStore(self.root, server, symbol, timeframe)
+
+    def _fetch_range(self, fetch_range, start: int, end: int):
+        rates = fetch_range(start, end)
+        if rates is not None:
+            self._count(fetched_bars=len(rates))
+        return rates
+
+    def _write(self, store: BarStore, rates: np.ndarray, start: int, end: int):
+        """Store the bars fetched for ``[start, end)``, covering only the span between the first and last one.
+
+        The terminal may still be downloading the history around them, those times are fetched again next time
+        instead of being cached as empty.
+        """
+        rates = rates[(rates["time"] >= start) & (rates["time"] < end)]
+        if len(rates):
+            store.write(rates, int(rates["time"][0]), int(rates["time"][-1]) + store.seconds)
+            self._evict_periodically()
+
+    def _evict_periodically(self):
+        """Evict the host cache when no process of the host did for MT5_BAR_CACHE_EVICT_INTERVAL seconds."""
+        marker = os.path.join(self.root, EVICTION_FILE)
+        try:
+            if time.time() - os.path.getmtime(marker) < settings.MT5_BAR_CACHE_EVICT_INTERVAL:
+                return
+        except FileNotFoundError:
+            pass
+        # Touched first, the other processes of the host skip it meanwhile
+        with open(marker, "a"):
+            os.utime(marker)
+        self.evict()
+
+    def rates_range(self, server: str, symbol: str, timeframe, date_from, date_to, server_now, fetch_range):
+        """The bars of ``copy_rates_range(symbol, timeframe, date_from, date_to)``."""
+        date_from, date_to = _timestamp(date_from), _timestamp(date_to)
+        if not self.enabled or not cacheable(timeframe):
+            return fetch_range(date_from, date_to)
+
+        store = self.store(server, symbol, timeframe)
+        seconds = store.seconds
+        now = server_now()
+        start = -(-date_from // seconds) * seconds
+        end = min(date_to, now) // seconds * seconds + seconds
+        open_bar = now // seconds * seconds
+
+        gaps = store.missing(start, min(end, open_bar))
+        for gap_start, gap_end in gaps:
+            rates = self._fetch_range(fetch_range, gap_start, gap_end - 1)
+            if rates is None:
+                return None
+            self._write(store, rates, gap_start, gap_end)
+
+        bars = store.read(start, min(end, open_bar))
+        if not gaps:
+            self._count(hits=1, cached_bars=len(bars))
+        elif gaps == [(start, min(end, open_bar))]:
+            self._count(misses=1)
+        else:
+            self._count(partial_hits=1, cached_bars=len(bars))
+        if end > open_bar:
+            live = self._fetch_range(fetch_range, open_bar, date_to)
+            if live is None:
+                return None
+            bars = np.concatenate((bars, live.astype(bars.dtype)))
+        return bars
+
+    def rates_from(self, server: str, symbol: str, timeframe, date_from, count: int, server_now, fetch_from,
+                   fetch_range):
+        """The bars of ``copy_rates_from(symbol, timeframe, date_from, count)``: ``count`` bars up to ``date_from``.
+
+        Served from the store when the interval stored before ``date_from`` holds enough bars once the gap after
+        it, if shorter than ``count`` bars, is filled.
+        """
+        date_from = _timestamp(date_from)
+        if not self.enabled or not cacheable(timeframe):
+            return fetch_from(date_from, count)
+
+        store = self.store(server, symbol, timeframe)
+        seconds = store.seconds
+        now = server_now()
+        last_bar = min(date_from, now) // seconds * seconds
+        open_bar = now // seconds * seconds
+        closed_end = min(last_bar + seconds, open_bar)
+
+        covered = store.covering(closed_end)
+        if covered is not None and closed_end - covered[1] <= count * seconds:
+            covered_start, covered_end = covered
+            partial = covered_end < closed_end
+            if partial:
+                rates = self._fetch_range(fetch_range, covered_end, closed_end - 1)
+                if rates is None:
+                    return None
+                self._write(store, rates, covered_end, closed_end)
+            bars = store.read(covered_start, closed_end)
+            if last_bar >= open_bar:
+                live = self._fetch_range(fetch_range, open_bar, now)
+                if live is None:
+                    return None
+                bars = np.concatenate((bars, live.astype(bars.dtype)))
+            if len(bars) >= count:
+                self._count(cached_bars=count, **{"partial_hits" if partial else "hits": 1})
+                return bars[len(bars) - count:]
+
+        self._count(misses=1)
+        rates = fetch_from(date_from, count)
+        if rates is None:
+            return None
+        self._count(fetched_bars=len(rates))
+        self._write(store, rates, 0, closed_end)
+        return rates
+
+    def rates_from_pos(self, server: str, symbol: str, timeframe, start_pos: int, count: int, server_now,
+                       fetch_from_pos, fetch_range):
+        """The bars of ``copy_rates_from_pos(symbol, timeframe, start_pos, count)``, counted back from the open bar."""
+        if not self.enabled or not cacheable(timeframe):
+            return fetch_from_pos(start_pos, count)
+
+        now = server_now()
+        rates = self.rates_from(server, symbol, timeframe, now, start_pos + count, lambda: now,
+                                lambda date_from, total: fetch_from_pos(0, total), fetch_range)
+        if rates is None or not start_pos:
+            return rates
+        return rates[:max(len(rates) - start_pos, 0)]
+
+    def evict(self, max_age: float = None, max_bytes: int = None) -> dict:
+        """Delete the stores not read for ``max_age`` seconds, then the least recently read ones above ``max_bytes``.
+
+        Only the stores of this host are evicted, each host evicts its own cache.
+
+        Returns:
+            dict: Number of stores and bytes deleted and kept
+        """
+        max_age = settings.MT5_BAR_CACHE_MAX_AGE if max_age is None else max_age
+        max_bytes = settings.MT5_BAR_CACHE_MAX_SIZE * 1024 * 1024 if max_bytes is None else max_bytes
+
+        stores = []
+        for path, _, files in os.walk(self.root):
+            if COVERAGE_FILE in files:
+                size = sum(os.path.getsize(os.path.join(path, name)) for name in files)
+                stores.append((os.path.getmtime(path), size, path))
+        stores.sort()
+
+        deleted = {"stores": 0, "bytes": 0}
+        total = sum(size for _, size, _ in stores)
+        for accessed_at, size, path in stores:
+            if time.time() - accessed_at <= max_age and total <= max_bytes:
+                break
+            _clear(path)
+            total -= size
+            deleted["stores"] += 1
+            deleted["bytes"] += size
+        self._count(evicted_stores=deleted["stores"])
+        logger.info("Bar cache eviction: %s deleted, %s bytes kept", deleted, total)
+        return dict(deleted, kept_bytes=total)
+
+
+_cache = None
+
+
+def get_bar_cache() -> BarCache:
+    global _cache
+    if _cache is None:
+        _cache = BarCache()
+    return _cache
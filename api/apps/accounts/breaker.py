@@ -0,0 +1,128 @@
+"""Circuit breakers around the MT5 terminals and broker trade servers.
+
+A breaker opens after MT5_BREAKER_THRESHOLD consecutive failures, from then on the accounts behind it fail fast
+with CircuitOpen instead of waiting on ``initialize()`` timeouts. After MT5_BREAKER_COOLDOWN seconds a single
+caller is let through as a probe (half-open): its success closes the breaker, its failure opens it again.
+
+The state lives in the Django cache, so it is shared by every worker process when the cache backend is.
+"""
+
+import time
+import uuid
+from logging import getLogger
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised when an account is skipped because the breaker of its terminal or server is open."""
+    pass
+
+
+class CircuitBreaker:
+    """Consecutive failure counter of one MT5 terminal or trade server.
+
+    Args:
+        name (str): The breaker name, like ``server:<Account.server>`` or ``terminal:<host>:<port>``
+
+    Keyword Args:
+        threshold (int): Consecutive failures that open the breaker.
+        cooldown (float): Seconds the breaker stays open before a probe is let through.
+    """
+
+    def __init__(self, name: str, threshold: int = None, cooldown: float = None):
+        self.name = name
+        self.threshold = threshold or settings.MT5_BREAKER_THRESHOLD
+        self.cooldown = cooldown or settings.MT5_BREAKER_COOLDOWN
+        self.key = "mt5-breaker:{}".format(name)
+        self._probe = None
+
+    def __repr__(self):
+        return "<CircuitBreaker {}>".format(self.name)
+
+    def _load(self) -> dict:
+        values = cache.get_many([self.key + ":failures", self.key + ":opened_at", self.key + ":reason"])
+        return {"failures": values.get(self.key + ":failures", 0), "opened_at": values.get(self.key + ":opened_at"),
+                "reason": values.get(self.key + ":reason", "")}
+
+    @property
+    def _timeout(self) -> float:
+        # Forgotten a while after the last failure, a breaker nobody trips again closes by itself
+        return self.cooldown * 10
+
+    def state(self) -> dict:
+        """The breaker status (closed, open or half_open), consecutive failures and last failure reason."""
+        state = self._load()
+        if state["opened_at"] is None:
+            status = CLOSED
+        elif time.time() - state["opened_at"] < self.cooldown:
+            status = OPEN
+        else:
+            status = HALF_OPEN
+        return dict(state, status=status)
+
+    def allow(self) -> bool:
+        """Whether a call may go through: the breaker is closed, or this caller won the half-open probe."""
+        state = self.state()
+        if state["status"] == CLOSED:
+            return True
+        if state["status"] == OPEN:
+            return False
+        token = uuid.uuid4().hex
+        if not cache.add(self.key + ":probe", token, self.cooldown):
+            return False
+        self._probe = token
+        return True
+
+    def check(self):
+        """Raise CircuitOpen unless a call may go through."""
+        if not self.allow():
+            state = self._load()
+            raise CircuitOpen("MT5 {} is unavailable after {} failures: {}".format(self.name, state["failures"],
+                                                                                 state["reason"]))
+
+    def release_probe(self):
+        """Let another caller probe when the probe of this caller ended with no success or failure to record."""
+        if self._probe is not None and cache.get(self.key + ":probe") == self._probe:
+            cache.delete(self.key + ":probe")
+        self._probe = None
+
+    def record_success(self):
+        if cache.get(self.key + ":failures") is not None:
+            cache.delete_many([self.key + ":failures", self.key + ":opened_at", self.key + ":reason",
+                               self.key + ":probe"])
+            logger.info("MT5 %s recovered", self.name)
+        self._probe = None
+
+    def record_failure(self, reason: str = ""):
+        # Counted atomically, concurrent failures of several workers all count
+        cache.add(self.key + ":failures", 0, self._timeout)
+        try:
+            failures = cache.incr(self.key + ":failures")
+        except ValueError:
+            # Expired in between
+            cache.add(self.key + ":failures", 1, self._timeout)
+            failures = 1
+        cache.touch(self.key + ":failures", self._timeout)
+        cache.set(self.key + ":reason", reason, self._timeout)
+        if failures >= self.threshold:
+            if cache.get(self.key + ":opened_at") is None:
+                logger.warning("MT5 %s failed %s times, opening its breaker: %s", self.name, failures, reason)
+            cache.set(self.key + ":opened_at", time.time(), self._timeout)
+            cache.delete(self.key + ":probe")
+        self._probe = None
+
+
+def server_breaker(server: str) -> CircuitBreaker:
+    return CircuitBreaker("server:{}".format(server))
+
+
+def terminal_breaker(host: str, port: int) -> CircuitBreaker:
+    return CircuitBreaker("terminal:{}:{}".format(host, port))
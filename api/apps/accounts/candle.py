@@ -1,7 +1,8 @@
 """Candle and Candles classes for handling bars from the MetaTrader 5 terminal."""
 
-from typing import Type, TypeVar, Generic, Iterable
+from typing import Type, TypeVar, Generic, Iterable, Iterator
 from logging import getLogger
+import operator
 import reprlib
 from typing import Type, Iterable, Union
 
@@ -10,6 +11,7 @@ from pandas import DataFrame, Series
 import pandas_ta as ta
 
 from .mt5 import TimeFrame
+from .resample import resample
 
 logger = getLogger(__name__)
 
@@ -17,6 +19,13 @@ class Candle:
     """A class representing bars from the MetaTrader 5 terminal as a customized class analogous to Japanese Candlesticks.
     You can subclass this class for added customization.
 
+    A candle is either standalone, holding its own values, or a view of one row of the NumPy columns of a Candles
+    object: reading an attribute reads the column at the row position and nothing is copied. Setting an attribute
+    on a view detaches it into a standalone candle first.
+
+    Views do not run ``__init__``. A subclass overriding it, to set derived attributes for example, gets standalone
+    candles built through its ``__init__`` instead, which copies every row: prefer properties for derived values.
+
     Attributes:
         time (int): Period start time.
         open (int): Open price
@@ -28,6 +37,7 @@ class Candle:
         spread (float): Spread
         Index (int): Custom attribute representing the position of the candle in a sequence.
     """
+    __slots__ = ('_values', '_position', 'Index')
     time: float
     high: float
     low: float
@@ -44,11 +54,74 @@ class Candle:
         Keyword Args:
             **kwargs: Candle attributes and values as keyword arguments.
         """
-        self.time = kwargs.pop('time', 0)
+        object.__setattr__(self, '_position', None)
+        object.__setattr__(self, '_values', {'time': kwargs.pop('time', 0)})
         self.Index = kwargs.pop('Index', 0)
         self.set_attributes(**kwargs)
+
+    @classmethod
+    def view(cls, columns: dict, position: int, index=None) -> 'Candle':
+        """A candle reading row ``position`` of ``columns``.
+
+        Args:
+            columns (dict): Column names to NumPy arrays
+            position (int): The row position in the arrays
+
+        Keyword Args:
+            index (int): The Index of the candle, the position by default.
+        """
+        index = position if index is None else index
+        if not cls.is_viewable():
+            return cls(Index=index, **{key: column[position] for key, column in columns.items()})
+        candle = cls.__new__(cls)
+        object.__setattr__(candle, '_values', columns)
+        object.__setattr__(candle, '_position', position)
+        object.__setattr__(candle, 'Index', index)
+        return candle
+
+    @classmethod
+    def is_viewable(cls) -> bool:
+        """Whether candles of this class can be views, their class does not override ``__init__``."""
+        return cls.__init__ is Candle.__init__
+
+    def _move(self, position: int, index):
+        object.__setattr__(self, '_position', position)
+        object.__setattr__(self, 'Index', index)
+
+    def __getattr__(self, item):
+        if item in Candle.__slots__:
+            # Not set yet, while unpickling
+            raise AttributeError(item)
+        try:
+            value = self._values[item]
+        except KeyError:
+            raise AttributeError(f'Attribute {item} not defined on class {self.__class__.__name__}')
+        position = self._position
+        return value if position is None else value[position]
+
+    def __setattr__(self, key, value):
+        if key in Candle.__slots__:
+            object.__setattr__(self, key, value)
+            return
+        if self._position is not None:
+            self.detach()
+        self._values[key] = value
+
+    def detach(self):
+        """Copy the row values of a view into the candle, it stops reading the Candles columns."""
+        if self._position is not None:
+            values = {key: column[self._position] for key, column in self._values.items()}
+            object.__setattr__(self, '_values', values)
+            object.__setattr__(self, '_position', None)
+
+    def items(self):
+        """The candle attributes and values."""
+        if self._position is None:
+            return self._values.items()
+        return ((key, column[self._position]) for key, column in self._values.items())
+
     def __repr__(self):
-        keys = reprlib.repr(', '.join('%s=%s' % (i, j) for i, j in self.__dict__.items()))[1:-1]
+        keys = reprlib.repr(', '.join('%s=%s' % (i, j) for i, j in self.items()))[1:-1]
         return '%(class)s(%(args)s)' % {'class': self.__class__.__name__, 'args': keys}
 
     def __eq__(self, other: 'Candle'):
@@ -63,13 +136,23 @@ class Candle:
     def __gt__(self, other: 'Candle'):
         return self.time > other.time
 
+    def __getstate__(self):
+        return dict(self.items()), self.Index
+
+    def __setstate__(self, state):
+        values, index = state
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_position', None)
+        object.__setattr__(self, 'Index', index)
+
     def set_attributes(self, **kwargs):
         """Set keyword arguments as instance attributes
 
         Keyword Args:
             **kwargs: Instance attributes and values as keyword arguments
         """
-        [setattr(self, i, j) for i, j in kwargs.items()]
+        for i, j in kwargs.items():
+            setattr(self, i, j)
 
     @property
     def mid(self) -> float:
@@ -122,6 +205,9 @@ class Candles(Generic[_Candle]):
     Notes:
         The candle class can be customized by subclassing the Candle class and passing the subclass as the candle keyword argument.
         Or defining it on the class body as a class attribute.
+
+        Slicing returns a window over views of the NumPy columns, sharing their memory, no DataFrame is built until
+        the data, ta or a column assignment needs one. Index the window's columns() to work on the arrays directly.
     """
     Index: Series
     time: Series
@@ -154,13 +240,46 @@ class Candles(Generic[_Candle]):
         else:
             raise ValueError(f'Cannot create DataFrame from object of {type(data)}')
 
-        self._data = data.iloc[::-1] if flip else data
+        self._frame = data.iloc[::-1] if flip else data
+        self._columns = None
+        self._arrays = None
         self.Candle = candle_class or Candle
 
+    @classmethod
+    def window(cls, columns: dict, candle_class: Type[_Candle] = None) -> _Candles:
+        """Candles over NumPy column views, the DataFrame is only built when something needs it.
+
+        Args:
+            columns (dict): Column names to NumPy arrays, usually slices sharing the memory of a parent Candles
+
+        Keyword Args:
+            candle_class: A subclass of Candle to use as the candle class. Defaults to Candle.
+        """
+        candles = cls.__new__(cls)
+        candles._frame = None
+        candles._columns = columns
+        candles._arrays = None
+        candles.Candle = candle_class or Candle
+        return candles
+
+    @property
+    def _data(self) -> DataFrame:
+        if self._frame is None:
+            self._frame = DataFrame(self._columns)
+            self._columns = None
+        return self._frame
+
+    @property
+    def is_materialized(self) -> bool:
+        """Whether the candles are backed by a DataFrame rather than column views."""
+        return self._frame is not None
+
     def __repr__(self):
         return self._data.__repr__()
 
     def __len__(self):
+        if self._columns is not None:
+            return len(next(iter(self._columns.values()), ()))
         return self._data.shape[0]
 
     def __contains__(self, item: _Candle):
@@ -168,30 +287,67 @@ class Candles(Generic[_Candle]):
 
     def __getitem__(self, index) -> Union[_Candle, _Candles]:
         if isinstance(index, slice):
-            cls = self.__class__
-            data = self._data.iloc[index]
-            data.reset_index(drop=True, inplace=True)
-            return cls(data=data)
+            # Basic NumPy slicing, the window shares the memory of these candles
+            columns = {name: column[index] for name, column in self.columns().items()}
+            return self.window(columns, self.Candle)
 
         if isinstance(index, str):
+            if self._columns is not None:
+                return Series(self._columns[index], name=index, copy=False)
             return self._data[index]
 
-        item = self._data.iloc[index]
-        return self.Candle(Index=index, **item)
+        # Views read their row lazily, a bad index would only fail at the first attribute read
+        size = len(self)
+        position = operator.index(index)
+        position = position + size if position < 0 else position
+        if not 0 <= position < size:
+            raise IndexError(f'Candle index {index} out of range for {size} candles')
+        return self.Candle.view(self.columns(), position)
 
     def __setitem__(self, index, value: Series):
         if isinstance(value, Series):
             self._data[index] = value
+            self._arrays = None
             return
         raise TypeError(f'Expected Series got {type(value)}')
 
     def __getattr__(self, item):
-        if item in list(self._data.columns.values):
-            return self._data[item]
+        if not item.startswith('_') and item in self.columns():
+            return self[item]
         raise AttributeError(f'Attribute {item} not defined on class {self.__class__.__name__}')
 
     def __iter__(self):
-        return (self.Candle(**row._asdict()) for row in self._data.itertuples())
+        return self.iterate()
+
+    def columns(self) -> dict:
+        """The columns of the candles as NumPy arrays, without copying them when they already are arrays."""
+        if self._columns is not None:
+            return self._columns
+        # Cached for the windows taken one after the other, dropped whenever the frame is handed out
+        if self._arrays is None:
+            self._arrays = {name: self._frame[name].to_numpy(copy=False) for name in self._frame.columns}
+        return self._arrays
+
+    def iterate(self, reuse: bool = False) -> Iterator[_Candle]:
+        """Iterate over the candles as views of the underlying columns.
+
+        Keyword Args:
+            reuse (bool): Yield one candle moved along the rows instead of a new view per row, nothing is allocated
+                per candle. A yielded candle is only valid until the next one, detach() it to keep it. Ignored for a
+                candle class overriding ``__init__``.
+        """
+        columns = self.columns()
+        labels = range(len(self)) if self._columns is not None else self._data.index.tolist()
+        if not reuse or not self.Candle.is_viewable():
+            view = self.Candle.view
+            for position, label in enumerate(labels):
+                yield view(columns, position, label)
+            return
+
+        candle = self.Candle.view(columns, 0)
+        for position, label in enumerate(labels):
+            candle._move(position, label)
+            yield candle
 
     @property
     def timeframe(self):
@@ -202,9 +358,14 @@ class Candles(Generic[_Candle]):
     def ta(self):
         """Access to the pandas_ta library for performing technical analysis on the underlying data attribute.
 
+        Its indicators are computed over the whole data on each call, keep an indicators.IndicatorEngine to update
+        them as candles are appended.
+
         Returns:
             pandas_ta: The pandas_ta library
         """
+        # Indicators may be appended to the frame
+        self._arrays = None
         return self._data.ta
 
     @property
@@ -218,9 +379,25 @@ class Candles(Generic[_Candle]):
 
     @property
     def data(self) -> DataFrame:
-        """The original data passed to the class as a pandas DataFrame"""
+        """The original data passed to the class as a pandas DataFrame
+
+        The columns() arrays are taken again from it afterwards, changes to the frame show in the candles. Changes
+        made through a frame kept from an earlier access do not.
+        """
+        self._arrays = None
         return self._data
 
+    def resample(self, timeframe: TimeFrame) -> _Candles:
+        """Derive the candles of a higher timeframe from these candles.
+
+        Args:
+            timeframe (TimeFrame): The timeframe of the derived candles
+
+        Returns:
+            Candles: The derived candles
+        """
+        return self.__class__(data=DataFrame(resample(self.columns(), timeframe)), candle_class=self.Candle)
+
     def rename(self, inplace=True, **kwargs) -> Union[_Candles, None]:
 
         """Rename columns of the candles class.
@@ -233,5 +410,6 @@ class Candles(Generic[_Candle]):
             Candles: A new instance of the class with the renamed columns if inplace is False.
             None: If inplace is True
         """
+        self._arrays = None
         res = self._data.rename(columns=kwargs, inplace=inplace)
         return res if inplace else self.__class__(data=res)
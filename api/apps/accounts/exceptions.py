@@ -1,11 +1,15 @@
 """Exceptions for the aiomql package."""
 
-__all__ = ['LoginError', 'VolumeError', 'SymbolError', 'OrderError']
+__all__ = ['LoginError', 'VolumeError', 'SymbolError', 'OrderError', 'TerminalTimeout']
 
 class LoginError(Exception):
     """Raised when an error occurs when logging in."""
     pass
 
+class TerminalTimeout(Exception):
+    """Raised when an MT5 call does not answer within its timeout."""
+    pass
+
 class VolumeError(Exception):
     """Raised when a volume is not valid or out of range for a symbol."""
     pass
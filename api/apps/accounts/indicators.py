@@ -0,0 +1,344 @@
+"""Technical indicators updated bar by bar instead of recomputed over the whole history.
+
+Each indicator keeps the rolling state its next value needs (EMA value and seed, running sums, ring buffers) and
+updates it in O(1) per appended bar. The values follow the ``pandas_ta`` definitions and column names:
+
+* ``SMA_<length>``: rolling mean.
+* ``EMA_<length>``: exponential mean seeded with the SMA of the first ``length`` values.
+* ``RSI_<length>`` and ``ATRr_<length>``: ``pandas_ta.rma``, an exponential mean of ``alpha = 1 / length`` in its
+  adjusted form, of the gains and losses and of the true range.
+
+``IndicatorEngine`` runs a set of indicators over Candles refreshed from the terminal, recomputing everything
+vectorized when the history it already saw has changed.
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+from pandas import Series
+
+NAN = float("nan")
+
+
+class Indicator:
+    """Base class of the incremental indicators.
+
+    Args:
+        length (int): The indicator period
+
+    Keyword Args:
+        column (str): The source column, for single column indicators.
+    """
+    prefix = ""
+
+    def __init__(self, length: int, column: str = "close"):
+        self.length = length
+        self.column = column
+        self.reset()
+
+    def __repr__(self):
+        return "<{} {}>".format(self.__class__.__name__, self.name)
+
+    @property
+    def name(self) -> str:
+        return "{}_{}".format(self.prefix, self.length)
+
+    def reset(self):
+        """Forget every bar seen."""
+        raise NotImplementedError
+
+    def update(self, bar) -> float:
+        """Add the next bar, anything indexable by column name, and return the indicator value at it."""
+        raise NotImplementedError
+
+    def copy(self) -> 'Indicator':
+        """A copy of the indicator in its current state."""
+        clone = object.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def compute(self, columns: dict) -> np.ndarray:
+        """Values over a whole history of NumPy columns, leaving the state after its last bar.
+
+        The default feeds the bars one by one, subclasses vectorize it.
+        """
+        self.reset()
+        names = list(columns)
+        return np.array([self.update(dict(zip(names, row))) for row in zip(*columns.values())], dtype=np.float64)
+
+
+class SMA(Indicator):
+    """Simple moving average, a ring buffer of the last ``length`` values and their sum."""
+    prefix = "SMA"
+
+    def reset(self):
+        self._window = deque(maxlen=self.length)
+        self._sum = 0.0
+
+    def copy(self) -> 'SMA':
+        clone = super().copy()
+        clone._window = self._window.copy()
+        return clone
+
+    def update(self, bar) -> float:
+        value = float(bar[self.column])
+        if len(self._window) == self.length:
+            self._sum -= self._window[0]
+        self._window.append(value)
+        self._sum += value
+        return self._sum / self.length if len(self._window) == self.length else NAN
+
+    def compute(self, columns: dict) -> np.ndarray:
+        values = np.asarray(columns[self.column], dtype=np.float64)
+        self.reset()
+        self._window.extend(values[-self.length:].tolist())
+        self._sum = float(values[-self.length:].sum())
+        return Series(values).rolling(self.length).mean().to_numpy()
+
+
+class EMA(Indicator):
+    """Exponential moving average of ``alpha = 2 / (length + 1)``, seeded with the SMA of the first values."""
+    prefix = "EMA"
+
+    def reset(self):
+        self._count = 0
+        self._seed = 0.0
+        self._value = NAN
+
+    def update(self, bar) -> float:
+        value = float(bar[self.column])
+        self._count += 1
+        if self._count < self.length:
+            self._seed += value
+            return NAN
+        if self._count == self.length:
+            self._value = (self._seed + value) / self.length
+        else:
+            alpha = 2 / (self.length + 1)
+            self._value = alpha * value + (1 - alpha) * self._value
+        return self._value
+
+    def compute(self, columns: dict) -> np.ndarray:
+        values = np.asarray(columns[self.column], dtype=np.float64)
+        self.reset()
+        if values.size < self.length:
+            for value in values:
+                self.update({self.column: value})
+            return np.full(values.size, NAN)
+        seeded = values.copy()
+        seeded[:self.length - 1] = NAN
+        seeded[self.length - 1] = values[:self.length].mean()
+        result = Series(seeded).ewm(span=self.length, adjust=False).mean().to_numpy()
+        self._count = values.size
+        self._value = float(result[-1])
+        return result
+
+
+class RMA:
+    """``pandas_ta.rma``: ``ewm(alpha=1 / length, min_periods=length).mean()``, adjusted, as a running ratio."""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.decay = 1 - 1 / length
+        self.count = 0
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def copy(self) -> 'RMA':
+        clone = object.__new__(RMA)
+        clone.__dict__.update(self.__dict__)
+        return clone
+
+    def update(self, value: float) -> float:
+        if math.isnan(value):
+            # Only the first difference is missing, before any value
+            return NAN
+        self.count += 1
+        self.numerator = value + self.decay * self.numerator
+        self.denominator = 1 + self.decay * self.denominator
+        return self.numerator / self.denominator if self.count >= self.length else NAN
+
+    def compute(self, values: np.ndarray) -> np.ndarray:
+        """Values over a whole series, leaving the state after its last value."""
+        means = Series(values).ewm(alpha=1 / self.length).mean()
+        valid = np.flatnonzero(~np.isnan(values))
+        self.count = int(valid.size)
+        if self.count:
+            self.denominator = (1 - self.decay ** self.count) / (1 - self.decay)
+            self.numerator = float(means.iloc[-1]) * self.denominator
+        return means.where(np.arange(values.size) >= (valid[self.length - 1] if valid.size >= self.length
+                                                     else values.size)).to_numpy()
+
+
+class RSI(Indicator):
+    """Relative strength index, the RMA of the gains over the RMA of gains and losses."""
+    prefix = "RSI"
+
+    def reset(self):
+        self._previous = None
+        self._gains = RMA(self.length)
+        self._losses = RMA(self.length)
+
+    def copy(self) -> 'RSI':
+        clone = super().copy()
+        clone._gains, clone._losses = self._gains.copy(), self._losses.copy()
+        return clone
+
+    def _value(self, gain: float, loss: float) -> float:
+        total = gain + abs(loss)
+        # Unchanged closes, undefined like in pandas_ta
+        return 100 * gain / total if total else NAN
+
+    def update(self, bar) -> float:
+        value = float(bar[self.column])
+        previous, self._previous = self._previous, value
+        if previous is None:
+            return NAN
+        change = value - previous
+        gain = self._gains.update(max(change, 0.0))
+        loss = self._losses.update(min(change, 0.0))
+        return self._value(gain, loss)
+
+    def compute(self, columns: dict) -> np.ndarray:
+        values = np.asarray(columns[self.column], dtype=np.float64)
+        self.reset()
+        if not values.size:
+            return np.zeros(0)
+        change = np.concatenate(([NAN], np.diff(values)))
+        gains = self._gains.compute(np.where(change < 0, 0.0, change))
+        losses = self._losses.compute(np.where(change > 0, 0.0, change))
+        self._previous = float(values[-1])
+        with np.errstate(invalid="ignore"):
+            return 100 * gains / (gains + np.abs(losses))
+
+
+class ATR(Indicator):
+    """Average true range, the RMA of the true range."""
+    prefix = "ATRr"
+
+    def reset(self):
+        self._previous = None
+        self._range = RMA(self.length)
+
+    def copy(self) -> 'ATR':
+        clone = super().copy()
+        clone._range = self._range.copy()
+        return clone
+
+    def update(self, bar) -> float:
+        high, low, close = float(bar["high"]), float(bar["low"]), float(bar["close"])
+        previous, self._previous = self._previous, close
+        if previous is None:
+            return NAN
+        return self._range.update(max(high - low, abs(high - previous), abs(previous - low)))
+
+    def compute(self, columns: dict) -> np.ndarray:
+        high, low, close = (np.asarray(columns[name], dtype=np.float64) for name in ("high", "low", "close"))
+        self.reset()
+        if not close.size:
+            return np.zeros(0)
+        previous = np.concatenate(([NAN], close[:-1]))
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(previous - low)))
+        true_range[0] = NAN
+        self._previous = float(close[-1])
+        return self._range.compute(true_range)
+
+
+class IndicatorEngine:
+    """Keeps indicator values up to date over candles refreshed from the terminal.
+
+    ``refresh()`` takes the whole, growing, history each time. When it extends the history already seen, only the
+    new bars, plus the last known bar since it may have been the open bar, are fed to the indicators. Otherwise
+    everything is recomputed vectorized: on the first call, when the history is shorter or starts at another bar,
+    or when the last closed bar seen changed. Edits deeper in the closed history are not looked for, call
+    ``recompute()`` after them.
+
+    Args:
+        *indicators (Indicator): The indicators to keep
+    """
+
+    def __init__(self, *indicators: Indicator):
+        self.indicators = list(indicators)
+        self.recomputes = 0
+        self._values = {indicator.name: np.zeros(0) for indicator in indicators}
+        self._count = 0
+        self._first = None
+        self._last = None
+        self._anchor = None
+        self._before_last = None
+
+    @staticmethod
+    def _bar(columns: dict, position: int) -> dict:
+        return {name: column[position] for name, column in columns.items()}
+
+    def _is_extended(self, columns: dict) -> bool:
+        """Whether ``columns`` starts with the bars seen, the last one possibly updated."""
+        count, times = self._count, columns["time"]
+        if not count or len(times) < count or times[0] != self._first or times[count - 1] != self._last:
+            return False
+        # The bar before the last one is closed, it must not have changed
+        return count < 2 or self._bar(columns, count - 2) == self._anchor
+
+    def _remember(self, columns: dict, count: int):
+        self._count = count
+        self._first, self._last = columns["time"][0], columns["time"][count - 1]
+        self._anchor = self._bar(columns, count - 2) if count > 1 else None
+
+    def recompute(self, columns: dict) -> dict:
+        """Compute every indicator over the whole history.
+
+        Args:
+            columns (dict): The whole history as NumPy columns
+
+        Returns:
+            dict: Indicator name to the NumPy array of its values over every candle
+        """
+        self.recomputes += 1
+        count = len(columns["time"])
+        closed = {name: column[:count - 1] for name, column in columns.items()}
+        self._values = {indicator.name: np.resize(indicator.compute(closed), max(count, 1))
+                        for indicator in self.indicators}
+        self._count = 0
+        if count:
+            # The states before the last bar, it is fed again when it changes
+            self._before_last = [indicator.copy() for indicator in self.indicators]
+            last = self._bar(columns, count - 1)
+            for indicator in self.indicators:
+                self._values[indicator.name][count - 1] = indicator.update(last)
+            self._remember(columns, count)
+        return self.values()
+
+    def refresh(self, candles) -> dict:
+        """Bring the indicators up to date with ``candles``.
+
+        Args:
+            candles (Candles | dict): The whole history, Candles or NumPy columns
+
+        Returns:
+            dict: Indicator name to the NumPy array of its values over every candle
+        """
+        columns = candles if isinstance(candles, dict) else candles.columns()
+        if not self._is_extended(columns):
+            return self.recompute(columns)
+
+        total = len(columns["time"])
+        for name, values in self._values.items():
+            if values.size < total:
+                # Grown geometrically, appending a bar rarely copies the values
+                self._values[name] = np.resize(values, max(total, 2 * values.size))
+        # The saved states are only needed again when no bar was added
+        self.indicators = self._before_last if total > self._count else [
+            indicator.copy() for indicator in self._before_last]
+        for position in range(self._count - 1, total):
+            bar = self._bar(columns, position)
+            if position == total - 1:
+                self._before_last = [indicator.copy() for indicator in self.indicators]
+            for indicator in self.indicators:
+                self._values[indicator.name][position] = indicator.update(bar)
+        self._remember(columns, total)
+        return self.values()
+
+    def values(self) -> dict:
+        """Indicator name to the NumPy array of its values over the candles seen."""
+        return {name: values[:self._count] for name, values in self._values.items()}
@@ -0,0 +1,42 @@
+from contextlib import ExitStack
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts import sync, tasks
+
+
+class Command(BaseCommand):
+    help = "Fetch the MT5 history of an AUTO account window by window, resuming from its last checkpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account_id',
+                            type=int,
+                            dest='account_id',
+                            required=True,
+                            help='Provide Account ID')
+        parser.add_argument('--window_days',
+                            type=int,
+                            dest='window_days',
+                            default=None,
+                            help='Days of history fetched per MT5 call, MT5_BACKFILL_WINDOW_DAYS by default')
+
+    def handle(self, *args, **options):
+        Account = apps.get_model("accounts", "Account")
+
+        account = Account.objects.filter(id=options["account_id"], account_type='AUTO').first()
+        if account is None:
+            raise CommandError("There's no AUTO account with id {}".format(options["account_id"]))
+
+        window = options["window_days"] * 24 * 60 * 60 if options["window_days"] else None
+        with ExitStack() as stack:
+            # The same locks as the sync tasks, the terminal serves one account at a time
+            if not stack.enter_context(tasks.account_lock(account.id)):
+                raise CommandError("Account {} is being synced, try again later".format(account.id))
+            if not stack.enter_context(tasks.terminal_slot(account)):
+                raise CommandError("The terminal of account {} is busy, try again later".format(account.id))
+            with account.mt5_session():
+                sync.backfill_history(account, window)
+
+        self.stdout.write("History of account {} backfilled until {}".format(account.id,
+                                                                             account.history_backfilled_until))
@@ -0,0 +1,70 @@
+import reprlib
+
+from django.core.management.base import BaseCommand
+from pandas import DataFrame
+
+from apps.accounts.candle import Candles
+from apps.utils.benchmarks import rates, timed
+
+
+class DictCandle:
+    """The Candle implementation before the slotted views, one __dict__ per candle."""
+
+    def __init__(self, **kwargs):
+        self.time = kwargs.pop('time', 0)
+        self.Index = kwargs.pop('Index', 0)
+        [setattr(self, i, j) for i, j in kwargs.items()]
+
+    def __repr__(self):
+        keys = reprlib.repr(', '.join('%s=%s' % (i, j) for i, j in self.__dict__.items()))[1:-1]
+        return '%(class)s(%(args)s)' % {'class': self.__class__.__name__, 'args': keys}
+
+
+class Command(BaseCommand):
+    help = "Time iterating over Candles with dict candles and candle views, and sliding windows over them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bars', type=int, dest='bars', default=500000,
+                            help='Number of M1 bars to generate')
+        parser.add_argument('--repeat', type=int, dest='repeat', default=3,
+                            help='Number of timed runs')
+        parser.add_argument('--window', type=int, dest='window', default=50,
+                            help='Bars per sliding window')
+        parser.add_argument('--windows', type=int, dest='windows', default=50000,
+                            help='Number of sliding windows taken')
+
+    def handle(self, *args, **options):
+        candles = Candles(data=DataFrame(rates(options["bars"])))
+        data = candles.data
+
+        runs = (
+            ("dict candles", lambda: sum(DictCandle(**row._asdict()).close for row in data.itertuples())),
+            ("candle views", lambda: sum(candle.close for candle in candles)),
+            ("reused view", lambda: sum(candle.close for candle in candles.iterate(reuse=True))),
+        )
+        self._compare(runs, options["repeat"])
+
+        size = options["window"]
+        starts = range(0, min(options["windows"], len(candles) - size))
+
+        def copied_windows():
+            total = 0
+            for start in starts:
+                window = data.iloc[start:start + size]
+                window.reset_index(drop=True, inplace=True)
+                total += window["close"].to_numpy().mean()
+            return total
+
+        runs = (
+            ("copied windows", copied_windows),
+            ("window views", lambda: sum(candles[start:start + size].columns()["close"].mean() for start in starts)),
+        )
+        self._compare(runs, options["repeat"])
+
+    def _compare(self, runs, repeat):
+        baseline = None
+        for name, run in runs:
+            elapsed, total = timed(run, repeat)
+            baseline = baseline or elapsed
+            self.stdout.write("{}: {:.3f}s ({:.1f}x), close sum {:.5f}".format(name, elapsed, baseline / elapsed,
+                                                                               total))
@@ -0,0 +1,55 @@
+import sys
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts import simulator
+
+
+class Command(BaseCommand):
+    help = "Serve the MT5 simulator on the rpyc protocol of mt5linux, in place of a Wine MetaTrader 5 terminal"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', dest='host', default='0.0.0.0',
+                            help='Address to listen on')
+        parser.add_argument('--port', type=int, dest='port', default=18812,
+                            help='Port to listen on, MT5_PORT of the clients')
+        parser.add_argument('--seed', type=int, dest='seed', default=0,
+                            help='Seed of the generated trades')
+        parser.add_argument('--latency', type=float, dest='latency', default=0,
+                            help='Milliseconds added to every call')
+        parser.add_argument('--jitter', type=float, dest='jitter', default=0,
+                            help='Maximum random milliseconds added on top of the latency')
+        parser.add_argument('--error_rate', type=float, dest='error_rate', default=0,
+                            help='Fraction of the calls failing with an IPC timeout')
+        parser.add_argument('--history_start', dest='history_start', default='2023-01-01',
+                            help='Date of the initial deposit and first trade, YYYY-MM-DD')
+        parser.add_argument('--trade_interval', type=int, dest='trade_interval', default=4 * 60 * 60,
+                            help='Seconds between two generated trades')
+        parser.add_argument('--down_server', action='append', dest='down_servers', default=[],
+                            help='Trade server whose logins time out, can be repeated')
+
+    def handle(self, *args, **options):
+        from rpyc.core import SlaveService
+        from rpyc.utils.server import ThreadedServer
+
+        history_start = datetime.strptime(options["history_start"], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        simulator.configure(seed=options["seed"],
+                            latency=options["latency"] / 1000,
+                            jitter=options["jitter"] / 1000,
+                            error_rate=options["error_rate"],
+                            history_start=int(history_start.timestamp()),
+                            trade_interval=options["trade_interval"],
+                            down_servers=set(options["down_servers"]))
+        # mt5linux runs ``import MetaTrader5 as mt5`` on the server
+        sys.modules["MetaTrader5"] = simulator
+
+        class SimulatorService(SlaveService):
+            def on_connect(self, conn):
+                super().on_connect(conn)
+                # copy_rates_* and copy_ticks_* send their dates as ``repr(datetime)``
+                self.namespace["datetime"] = __import__("datetime")
+
+        self.stdout.write("MT5 simulator listening on {}:{}".format(options["host"], options["port"]))
+        ThreadedServer(SimulatorService, hostname=options["host"], port=options["port"], reuse_addr=True,
+                       protocol_config={"allow_public_attrs": True, "allow_pickle": True}).start()
@@ -0,0 +1,36 @@
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.accounts.terminals import HashRing, configured_terminals, parse_terminal
+
+
+class Command(BaseCommand):
+    help = "Show how AUTO accounts are spread over the MT5 terminals, and how many would move on a terminal change"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--add', action='append', dest='add', default=[],
+                            help='host:port of a terminal to add, can be repeated')
+        parser.add_argument('--remove', action='append', dest='remove', default=[],
+                            help='host:port of a terminal to remove, can be repeated')
+
+    def handle(self, *args, **options):
+        Account = apps.get_model("accounts", "Account")
+        account_ids = list(Account.objects.filter(account_type='AUTO').values_list("id", flat=True))
+
+        current = HashRing(configured_terminals(), settings.MT5_HASH_REPLICAS)
+        assignment = {account_id: current.get(account_id) for account_id in account_ids}
+        for (host, port), count in sorted(Counter(assignment.values()).items()):
+            self.stdout.write("{}:{} {} accounts".format(host, port, count))
+
+        if not options["add"] and not options["remove"]:
+            return
+
+        removed = {parse_terminal(value) for value in options["remove"]}
+        terminals = [terminal for terminal in current.terminals if terminal not in removed]
+        terminals += [parse_terminal(value) for value in options["add"]]
+        changed = HashRing(terminals, settings.MT5_HASH_REPLICAS)
+        moved = sum(1 for account_id in account_ids if changed.get(account_id) != assignment[account_id])
+        self.stdout.write("{} of {} accounts would move to another terminal".format(moved, len(account_ids)))
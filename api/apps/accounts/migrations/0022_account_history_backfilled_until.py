@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_membership_email_alter_account_last_order_end_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='history_backfilled_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='history backfilled until'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.9 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_account_history_backfilled_until'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='next sync at'),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='sync_interval',
+            field=models.IntegerField(default=60, verbose_name='sync interval'),
+        ),
+    ]
@@ -22,14 +22,17 @@ from . import choices
 from apps.settings.models import TerminalPageModule, TerminalDimensions
 from apps.users.choices import CURRENCY_CHOICE, currency_codes
 from . import mt5
-from mt5linux import MetaTrader5
+from .pool import pooled, get_session_pool
 from typing import Type
 from .errors import Error
 from .exceptions import LoginError
 from typing import Optional, Union, Tuple
 from datetime import datetime, timedelta
 from rest_framework import exceptions
-from . import candle
+from . import candle, resample
+from .transport import copy_array
+from .bars import get_bar_cache
+from .snapshot import AccountSnapshot
 from apps.utils.exceptions import WrongArguments
  
 def get_account_file_path(instance, filename):
@@ -134,6 +137,9 @@ class Account(models.Model):
     modified_date = models.DateTimeField( _("modified date"), auto_now=True)
     last_order_end_date = models.DateTimeField(_("last order end date"), null=True, blank=True)
     last_deal_end_date = models.DateTimeField(_("last deal end date"), null=True, blank=True)
+    history_backfilled_until = models.DateTimeField(_("history backfilled until"), null=True, blank=True)
+    next_sync_at = models.DateTimeField(_("next sync at"), null=True, blank=True, db_index=True)
+    sync_interval = models.IntegerField(_("sync interval"), default=60)
     start_date = timezone.now() - timedelta(days=365)
     end_date = timezone.now()
     path = "/home/kasm-user/.wine/drive_c/Program Files/MetaTrader 5/terminal64.exe"
@@ -251,6 +257,15 @@ class Account(models.Model):
             return self.connected
         return False
 
+    def mt5_session(self):
+        """Keep one pooled MT5 session checked out across several calls on this account.
+
+        Returns:
+            ContextManager[TerminalSession]: The checked out session
+        """
+        return get_session_pool().session(self)
+
+    @pooled
     def login(self) -> bool:
         """
         Connects to the MetaTrader terminal using the specified login, password and server.
@@ -264,34 +279,33 @@ class Account(models.Model):
         Returns:
             bool: True if successful, False otherwise.
         """
-        self.initialize()
         return self.MetaTrader5.login(self.username, password=self.password, server=self.server, timeout=self.timeout)
 
     def initialize(self) -> bool:
         """
-        Initializes the connection to the MetaTrader terminal. All parameters are optional.
+        Initializes the MetaTrader terminal for this account. Called by the session pool on the checked out
+        session whenever the terminal is logged into another account.
 
         Keyword Args:
             timeout (int): The timeout for the connection in seconds.
             portable (bool): If True, the terminal will be launched in portable mode.
 
         Returns:
-            bool: True if successful, False otherwise.
+            bool: True if successful, False otherwise, last_error() tells why.
+
+        Raises:
+            EOFError, OSError: The RPC connection to the terminal dropped.
         """
         kwargs = {key: value for key, value in (('path', self.path), ('login', self.username), ('password', self.password), ('server', self.server),
                                                 ('timeout', self.timeout), ('portable', self.portable)) if value}
-        try:
-            self.MetaTrader5 = MetaTrader5(host = settings.MT5_HOST, port = settings.MT5_PORT )
-            return self.MetaTrader5.initialize(**kwargs)
-        except:
-            raise Exception("Invalid login credentials")
+        return self.MetaTrader5.initialize(**kwargs)
 
     def last_error(self) -> list[int, str]:
         return self.MetaTrader5.last_error()
 
+    @pooled
     def account_info(self) -> Optional[mt5.AccountInfo] :
         """"""
-        self.initialize()
         res = self.MetaTrader5.account_info()
 
         if res is None:
@@ -310,8 +324,8 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def symbols_get(self, group: str = "") -> Optional[list[mt5.SymbolInfo]]:
-        self.initialize()
         kwargs = {'group': group} if group else {}
         res = self.MetaTrader5.symbols_get(**kwargs)
 
@@ -338,8 +352,8 @@ class Account(models.Model):
             raise WrongArguments(f'Error: {err}; {symbol} not available in this market')
             return False
 
+    @pooled
     def symbol_info(self, symbol: str) -> Optional[mt5.SymbolInfo]:
-        self.initialize()
         self.MetaTrader5.symbol_select(symbol, True)
    
         res = self.MetaTrader5.symbol_info(symbol)
@@ -351,8 +365,8 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def symbol_info_tick(self, symbol: str) -> Optional[mt5.Tick]:
-        self.initialize()
         res = self.MetaTrader5.symbol_info_tick(symbol)
 
         if res is None:
@@ -362,16 +376,16 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def symbol_select(self, symbol: str, enable: bool) -> bool:
-        self.initialize()
         return self.MetaTrader5.symbol_select(symbol, enable)
 
+    @pooled
     def market_book_add(self, symbol: str) -> bool:
-        self.initialize()
         return self.MetaTrader5.market_book_add(symbol)
 
+    @pooled
     def market_book_get(self, symbol: str) -> Optional[list[mt5.BookInfo]]:
-        self.initialize()
         self.MetaTrader5.market_book_add(symbol)
         res = self.MetaTrader5.market_book_get(symbol)
 
@@ -382,42 +396,65 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def market_book_release(self, symbol: str) -> bool:
-        self.initialize()
         return self.MetaTrader5.market_book_release(symbol)
 
+    def _server_time(self, symbol: str) -> int:
+        """The trade server time, from the last tick of ``symbol``."""
+        return self.symbol_info_tick(symbol).time
+
+    @pooled
     def copy_rates_from(self, symbol: str, timeframe: Union[mt5.TimeFrame, int], date_from: Union[datetime, int], count: int) -> candle.Candles:
-        self.initialize()
-        
-        rates = self.MetaTrader5.copy_rates_from(symbol, timeframe, date_from, count)
+        rates = get_bar_cache().rates_from(
+            self.server, symbol, timeframe, date_from, count, lambda: self._server_time(symbol),
+            lambda date_from, count: copy_array(self.MetaTrader5, 'copy_rates_from', symbol, timeframe, date_from, count),
+            lambda date_from, date_to: copy_array(self.MetaTrader5, 'copy_rates_range', symbol, timeframe, date_from, date_to))
         if rates is not None:
             return candle.Candles(data=rates)
         raise ValueError(f'Could not get rates for {symbol}')
-       
-       
 
+    @pooled
     def copy_rates_from_pos(self, symbol: str, timeframe: Union[mt5.TimeFrame, int], start_pos: int, count: int)-> candle.Candles:
-        self.initialize()
-       
-        rates = self.MetaTrader5.copy_rates_from_pos(symbol, timeframe, start_pos, count)
+        rates = get_bar_cache().rates_from_pos(
+            self.server, symbol, timeframe, start_pos, count, lambda: self._server_time(symbol),
+            lambda start_pos, count: copy_array(self.MetaTrader5, 'copy_rates_from_pos', symbol, timeframe, start_pos, count),
+            lambda date_from, date_to: copy_array(self.MetaTrader5, 'copy_rates_range', symbol, timeframe, date_from, date_to))
         if rates is not None:
             return candle.Candles(data=rates)
         raise ValueError(f'Could not get rates for {symbol}')
-       
 
+    @pooled
     def copy_rates_range(self, symbol: str, timeframe: Union[mt5.TimeFrame, int], date_from: Union[datetime, int], date_to: Union[datetime, int]) -> candle.Candles:
-        self.initialize()        
-        rates = self.MetaTrader5.copy_rates_range(symbol, timeframe, date_from, date_to)
+        rates = get_bar_cache().rates_range(
+            self.server, symbol, timeframe, date_from, date_to, lambda: self._server_time(symbol),
+            lambda date_from, date_to: copy_array(self.MetaTrader5, 'copy_rates_range', symbol, timeframe, date_from, date_to))
         if rates is not None:
             return candle.Candles(data=rates)
         else:
             err = self.last_error()
             raise WrongArguments(f'Could not get rates for {symbol}.{Error(*err)}')
-      
 
+    @pooled
+    def resample_rates_range(self, symbol: str, timeframe: Union[mt5.TimeFrame, int], date_from: Union[datetime, int], date_to: Union[datetime, int],
+                             source: Union[mt5.TimeFrame, int] = mt5.TimeFrame.M1) -> candle.Candles:
+        """copy_rates_range for ``timeframe`` derived from the ``source`` bars, usually already in the bar cache.
+
+        Keyword Args:
+            source (TimeFrame): The finer timeframe the bars are derived from. Defaults to M1.
+
+        Returns:
+            Candles: The bars starting in the range, the last one is partial while it is open
+        """
+        date_from = int(date_from.timestamp()) if isinstance(date_from, datetime) else int(date_from)
+        start = int(resample.bar_times([date_from], timeframe)[0])
+        rates = resample.resample(self.copy_rates_range(symbol, source, start, date_to).columns(), timeframe,
+                                  source=source)
+        return candle.Candles(data=rates[rates['time'] >= date_from])
+
+    @pooled
     def copy_ticks_from(self, symbol: str, date_from: Union[datetime, int], count: int, flags: mt5.CopyTicks):
-        self.initialize()
-        res = self.MetaTrader5.copy_ticks_from(symbol, date_from, count, flags)
+        res = copy_array(self.MetaTrader5, 'copy_ticks_from', symbol, date_from, count, flags)
 
         if res is None:
             err = self.last_error()
@@ -426,9 +463,9 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def copy_ticks_range(self, symbol: str, date_from: Union[datetime, int], date_to: Union[datetime, int], flags: mt5.CopyTicks):
-        self.initialize()
-        res = self.MetaTrader5.copy_ticks_range(symbol, date_from, date_to, flags)
+        res = copy_array(self.MetaTrader5, 'copy_ticks_range', symbol, date_from, date_to, flags)
 
         if res is None:
             err = self.last_error()
@@ -437,6 +474,7 @@ class Account(models.Model):
 
         return res
 
+    @pooled
     def orders_get(self, group: str = "", ticket: int = 0, symbol: str = ""):
         """Get active orders with the ability to filter by symbol or ticket. There are three call options.
            Call without parameters. Return active orders on all symbols
@@ -453,7 +491,6 @@ class Account(models.Model):
             list[TradeOrder]: A list of active trade orders as TradeOrder objects
         """
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('symbol', symbol)) if value}
-        self.initialize()
         res = self.MetaTrader5.orders_get(**kwargs)
 
         if res is None:
@@ -463,9 +500,9 @@ class Account(models.Model):
 
         return res[::-1]
 
+    @pooled
     def positions_get(self, group: str = "", ticket: int = 0, symbol: str = "") -> Optional[list[mt5.TradePosition]]:
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('symbol', symbol)) if value}
-        self.initialize()
         res = self.MetaTrader5.positions_get(**kwargs)
 
         if res is None:
@@ -475,10 +512,10 @@ class Account(models.Model):
 
         return res[::-1]
 
+    @pooled
     def history_orders_get(self, date_from: Union[datetime, int] = None, date_to: Union[datetime, int] = None, group: str = '',
                                  ticket: int = 0, position: int = 0) -> Optional[list[mt5.TradeOrder]]:
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('position', position)) if value}
-        self.initialize()
 
         if ticket:
             response = self.MetaTrader5.history_orders_get(ticket=int(ticket))
@@ -494,11 +531,11 @@ class Account(models.Model):
 
         return response[::-1]
 
+    @pooled
     def history_deals_get(self, date_from: Union[datetime, int] = None, date_to: Union[datetime, int] = None, group: str = '',
                                 ticket: int = 0, position: int = 0) -> Optional[list[mt5.TradeDeal]]:
         kwargs = {key: value for key, value in (('group', group), ('ticket', ticket), ('position', position)) if value}
 
-        self.initialize()
         if ticket:
             response = self.MetaTrader5.history_deals_get(ticket=int(ticket))
         elif position:
@@ -513,6 +550,29 @@ class Account(models.Model):
 
         return response[::-1]
 
+    @pooled
+    def snapshot(self, date_from: Union[datetime, int], date_to: Union[datetime, int]) -> AccountSnapshot:
+        """Pull account info, the history of a window, open positions and pending orders with a single login.
+
+        Args:
+            date_from (datetime | int): History window start
+            date_to (datetime | int): History window end
+
+        Returns:
+            AccountSnapshot: The account data as dicts
+        """
+        account_info = self.account_info()
+        history_deals = self.history_deals_get(date_from=date_from, date_to=date_to)
+        history_orders = self.history_orders_get(date_from=date_from, date_to=date_to)
+        positions = self.positions_get()
+        orders = self.orders_get()
+        return AccountSnapshot(account_info=account_info._asdict(),
+                               history_deals=[deal._asdict() for deal in history_deals],
+                               history_orders=[order._asdict() for order in history_orders],
+                               positions=[position._asdict() for position in positions],
+                               orders=[order._asdict() for order in orders],
+                               date_from=date_from, date_to=date_to)
+
 class Broker(models.Model):
     name = models.CharField(max_length=250, unique=True, null=False, blank=False, verbose_name=_("name"))
     description = models.TextField(null=True, blank=True, verbose_name=_("description"))
@@ -0,0 +1,256 @@
+"""Process wide pool of MetaTrader 5 RPC sessions.
+
+Every ``Account`` MT5 method used to build a brand new ``mt5linux.MetaTrader5`` connection and re-run
+``initialize()`` with the account login. The pool keeps connections to the terminal alive between calls,
+checks them out per account and skips the login when the terminal is already logged into that account.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from logging import getLogger
+
+from django.conf import settings
+from django_pglocks import advisory_lock
+from mt5linux import MetaTrader5
+
+from . import breaker, terminals, transport
+from .exceptions import LoginError
+
+logger = getLogger(__name__)
+
+# last_error() code of a login rejected by the trade server
+AUTHORIZATION_FAILED = -6
+
+# Seconds between attempts to lock a terminal held by another process
+LOCK_POLL_INTERVAL = 0.1
+
+
+class PoolTimeout(Exception):
+    """Raised when no session could be checked out before the pool timeout."""
+    pass
+
+
+class TerminalSession:
+    """A live RPC connection to a MetaTrader 5 terminal.
+
+    Attributes:
+        host (str): Terminal RPC host
+        port (int): Terminal RPC port
+        client (MetaTrader5): The mt5linux client bound to the connection
+        last_used_at (float): Monotonic time of the last check in
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.client = None
+        self.last_used_at = 0.0
+
+    def __repr__(self):
+        return "<TerminalSession {0}:{1}>".format(self.host, self.port)
+
+    @property
+    def terminal(self) -> tuple:
+        return self.host, self.port
+
+    def connect(self):
+        self.client = MetaTrader5(host=self.host, port=self.port)
+        transport.install(self.client)
+        self.last_used_at = time.monotonic()
+
+    def is_alive(self) -> bool:
+        """Cheap round-trip to check the RPC connection is still usable."""
+        try:
+            return self.client is not None and self.client.eval("1") == 1
+        except Exception:
+            return False
+
+
+class SessionPool:
+    """Keeps MetaTrader 5 sessions alive and hands them out per account.
+
+    The MetaTrader5 python module lives once per terminal process, so the logged in account is terminal wide
+    state: while an account uses a terminal, no other account may log it in. A terminal is therefore checked out
+    to one account at a time, by the pool within the process and by a Postgres advisory lock held for the whole
+    checkout across worker processes. ``initialize()`` only runs when ``account_info()`` shows the terminal logged
+    into another account.
+
+    Keyword Args:
+        timeout (float): Seconds to wait for the terminal before raising PoolTimeout.
+        healthcheck_interval (float): Idle seconds after which a session is pinged before being reused.
+    """
+
+    def __init__(self, timeout: float = 30, healthcheck_interval: float = 30):
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._condition = threading.Condition()
+        self._idle = {}
+        self._busy = set()
+        self._counters = defaultdict(float)
+
+    def _count(self, name: str, elapsed: float = None):
+        with self._condition:
+            self._counters["{}_count".format(name)] += 1
+            if elapsed is not None:
+                self._counters["{}_seconds".format(name)] += elapsed
+
+    def stats(self) -> dict:
+        """Snapshot of the pool counters (checkouts, reuses, connects, logins, discards and their latencies)."""
+        with self._condition:
+            stats = dict(self._counters)
+            stats["open_sessions"] = len(self._idle) + len(self._busy)
+            stats["idle_sessions"] = len(self._idle)
+        for name in ("connect", "login"):
+            count = stats.get("{}_count".format(name), 0)
+            stats["{}_avg_seconds".format(name)] = stats.get("{}_seconds".format(name), 0) / count if count else 0
+        return stats
+
+    def _take(self, terminal: tuple, deadline: float) -> TerminalSession:
+        with self._condition:
+            while terminal in self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout("No MT5 session available on {0}:{1}".format(*terminal))
+                self._condition.wait(remaining)
+            self._busy.add(terminal)
+            return self._idle.pop(terminal, None)
+
+    def _free(self, terminal: tuple, session: TerminalSession = None):
+        with self._condition:
+            self._busy.discard(terminal)
+            if session is not None:
+                session.last_used_at = time.monotonic()
+                self._idle[terminal] = session
+            self._condition.notify_all()
+
+    def _checkout(self, terminal: tuple, deadline: float) -> TerminalSession:
+        self._count("checkout")
+        session = self._take(terminal, deadline)
+        try:
+            if session is not None and time.monotonic() - session.last_used_at > self.healthcheck_interval:
+                if not session.is_alive():
+                    logger.info("Dropping dead MT5 session %r", session)
+                    self._count("discard")
+                    session = None
+
+            if session is None:
+                session = TerminalSession(*terminal)
+                started = time.monotonic()
+                session.connect()
+                self._count("connect", time.monotonic() - started)
+        except Exception:
+            self._free(terminal)
+            raise
+        return session
+
+    def _lock_terminal(self, stack: ExitStack, terminal: tuple, deadline: float):
+        """Hold ``terminal`` across worker processes until ``stack`` closes."""
+        name = "mt5-terminal-{0}:{1}".format(*terminal)
+        while not stack.enter_context(advisory_lock(name, wait=False)):
+            if time.monotonic() >= deadline:
+                raise PoolTimeout("MT5 terminal {0}:{1} is busy in another process".format(*terminal))
+            time.sleep(LOCK_POLL_INTERVAL)
+
+    @staticmethod
+    def _is_logged_in(session: TerminalSession, account) -> bool:
+        info = session.client.account_info()
+        return info is not None and info.login == account.username
+
+    def terminal_for(self, account) -> tuple:
+        return terminals.terminal_for(account)
+
+    @contextmanager
+    def session(self, account):
+        """Check out a session logged into ``account``.
+
+        Nested use on the same account instance reuses the session already checked out, so grouped calls
+        never log in twice.
+        """
+        current = getattr(account, "_mt5_session", None)
+        if current is not None:
+            yield current
+            return
+
+        terminal = self.terminal_for(account)
+        terminal_breaker = breaker.terminal_breaker(*terminal)
+        server_breaker = breaker.server_breaker(account.server)
+        try:
+            terminal_breaker.check()
+            server_breaker.check()
+
+            deadline = time.monotonic() + self.timeout
+            try:
+                session = self._checkout(terminal, deadline)
+            except PoolTimeout:
+                raise
+            except Exception as e:
+                terminal_breaker.record_failure(repr(e))
+                raise
+            terminal_breaker.record_success()
+        except Exception:
+            # A probe that never reached its terminal or server lets the next caller probe
+            terminal_breaker.release_probe()
+            server_breaker.release_probe()
+            raise
+
+        account._mt5_session = session
+        account.MetaTrader5 = session.client
+        broken = False
+        try:
+            with ExitStack() as stack:
+                self._lock_terminal(stack, terminal, deadline)
+                if self._is_logged_in(session, account):
+                    self._count("reuse")
+                else:
+                    started = time.monotonic()
+                    initialized = account.initialize()
+                    self._count("login", time.monotonic() - started)
+                    if not initialized:
+                        code, description = account.last_error()
+                        if code == AUTHORIZATION_FAILED:
+                            # The server answered, the credentials of this one account are wrong
+                            server_breaker.record_success()
+                        else:
+                            server_breaker.record_failure("{} {}".format(code, description))
+                        raise LoginError("Could not log into {} on {}: {} {}".format(
+                            account.username, account.server, code, description))
+                server_breaker.record_success()
+                yield session
+        except (EOFError, OSError) as e:
+            # The RPC connection dropped, never hand this session out again
+            broken = True
+            terminal_breaker.record_failure(repr(e))
+            raise
+        finally:
+            server_breaker.release_probe()
+            account._mt5_session = None
+            if broken:
+                self._count("discard")
+                self._free(terminal)
+            else:
+                self._free(terminal, session)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SessionPool(timeout=settings.MT5_POOL_TIMEOUT,
+                                healthcheck_interval=settings.MT5_POOL_HEALTHCHECK_INTERVAL)
+        return _pool
+
+
+def pooled(method):
+    """Run an ``Account`` MT5 method inside a pooled session."""
+    @wraps(method)
+    def _decorator(account, *args, **kwargs):
+        with get_session_pool().session(account):
+            return method(account, *args, **kwargs)
+    return _decorator
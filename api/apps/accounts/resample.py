@@ -0,0 +1,116 @@
+"""Derive the bars of a TimeFrame from the bars of a finer one, without asking the terminal.
+
+Bars are NumPy structured arrays like the ``copy_rates_*`` results, or mappings of column names to arrays like
+``Candles.columns()``. A derived bar has the open of its first source bar, the close of its last one, the highest
+high, the lowest low, the summed tick and real volumes and the lowest spread.
+
+Bar times are trade server times: intraday and daily bars start on multiples of their length, weekly bars on
+Sunday 00:00 like MT5 weekly bars, monthly bars on the first day of the month.
+"""
+
+import numpy as np
+
+from .bars import RATES_DTYPE
+from .mt5 import TimeFrame
+
+# 1970-01-04, the first Sunday after the epoch
+FIRST_SUNDAY = 3 * 24 * 60 * 60
+
+
+def bar_times(times: np.ndarray, timeframe) -> np.ndarray:
+    """The start time of the ``timeframe`` bar each of ``times`` falls in."""
+    timeframe = TimeFrame(timeframe)
+    times = np.asarray(times, dtype=np.int64)
+    if timeframe == TimeFrame.MN1:
+        return times.astype("datetime64[s]").astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+    if timeframe == TimeFrame.W1:
+        return (times - FIRST_SUNDAY) // timeframe.time * timeframe.time + FIRST_SUNDAY
+    return times // timeframe.time * timeframe.time
+
+
+def _check(source, timeframe):
+    source, timeframe = TimeFrame(source), TimeFrame(timeframe)
+    if timeframe in (TimeFrame.W1, TimeFrame.MN1):
+        finer = source.time <= TimeFrame.D1.time
+    else:
+        finer = source.time <= timeframe.time and timeframe.time % source.time == 0
+    if not finer:
+        raise ValueError(f'{timeframe} bars can not be derived from {source} bars')
+
+
+def resample(rates, timeframe, source=None) -> np.ndarray:
+    """Aggregate bars into ``timeframe`` bars.
+
+    Args:
+        rates (np.ndarray | dict): Bars in chronological order
+        timeframe (TimeFrame | int): The timeframe of the derived bars
+
+    Keyword Args:
+        source (TimeFrame | int): The timeframe of ``rates``, checked to be finer when given.
+
+    Returns:
+        np.ndarray: The derived bars, with the fields of RATES_DTYPE
+    """
+    if source is not None:
+        _check(source, timeframe)
+
+    times = np.asarray(rates["time"], dtype=np.int64)
+    bars = np.zeros(0, dtype=RATES_DTYPE)
+    if not times.size:
+        return bars
+
+    starts = bar_times(times, timeframe)
+    first = np.concatenate(([0], np.flatnonzero(np.diff(starts)) + 1))
+    last = np.concatenate((first[1:] - 1, [times.size - 1]))
+
+    bars = np.zeros(first.size, dtype=RATES_DTYPE)
+    bars["time"] = starts[first]
+    bars["open"] = np.asarray(rates["open"])[first]
+    bars["close"] = np.asarray(rates["close"])[last]
+    bars["high"] = np.maximum.reduceat(np.asarray(rates["high"]), first)
+    bars["low"] = np.minimum.reduceat(np.asarray(rates["low"]), first)
+    for name in ("tick_volume", "real_volume"):
+        bars[name] = np.add.reduceat(np.asarray(rates[name]), first)
+    bars["spread"] = np.minimum.reduceat(np.asarray(rates["spread"]), first)
+    return bars
+
+
+class Resampler:
+    """Keeps the ``timeframe`` bars of a stream of finer bars up to date.
+
+    Only the source bars of the current, still open, ``timeframe`` bar are kept. ``update()`` accepts new bars and
+    new values of the bars already seen, like the open M1 bar polled again, and re-aggregates the current bar only.
+
+    Args:
+        timeframe (TimeFrame | int): The timeframe of the derived bars
+        source (TimeFrame | int): The timeframe of the bars fed to update()
+    """
+
+    def __init__(self, timeframe, source=TimeFrame.M1):
+        _check(source, timeframe)
+        self.timeframe = TimeFrame(timeframe)
+        self.source = TimeFrame(source)
+        self._pending = np.zeros(0, dtype=RATES_DTYPE)
+        self.current = None
+
+    def update(self, rates: np.ndarray) -> np.ndarray:
+        """Add source bars.
+
+        Args:
+            rates (np.ndarray): Source bars in chronological order, starting at or after the current bar
+
+        Returns:
+            np.ndarray: The ``timeframe`` bars completed by these bars, ``current`` holds the partial bar
+        """
+        if not len(rates):
+            return np.zeros(0, dtype=RATES_DTYPE)
+        rates = np.asarray(rates).astype(RATES_DTYPE)
+        pending = self._pending[self._pending["time"] < rates["time"][0]]
+        pending = np.concatenate((pending, rates))
+
+        starts = bar_times(pending["time"], self.timeframe)
+        split = np.searchsorted(starts, starts[-1])
+        completed = resample(pending[:split], self.timeframe)
+        self._pending = pending[split:]
+        self.current = resample(self._pending, self.timeframe)[0]
+        return completed
@@ -0,0 +1,77 @@
+"""Adaptive MT5 sync schedule of the AUTO accounts.
+
+Every account stores when it is due (``next_sync_at``) and its current polling interval (``sync_interval``). An
+account with new deals, open positions or pending orders is polled every MT5_SYNC_MIN_INTERVAL seconds, each idle
+sync multiplies the interval by MT5_SYNC_BACKOFF up to MT5_SYNC_MAX_INTERVAL, and while the forex market is closed
+for the weekend the interval jumps to the maximum, never sleeping past the reopening.
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+# Weekly forex session close and reopen in UTC, as (weekday, hour)
+MARKET_CLOSE = (4, 22)
+MARKET_OPEN = (6, 22)
+# How long a dispatched account is not dispatched again, in case its task is lost
+DISPATCH_LEASE = timedelta(minutes=10)
+
+
+def market_reopens_at(now: datetime):
+    """When the market reopens if it is closed for the weekend at ``now`` (UTC), otherwise None."""
+    hours = now.weekday() * 24 + now.hour
+    close = MARKET_CLOSE[0] * 24 + MARKET_CLOSE[1]
+    reopen = MARKET_OPEN[0] * 24 + MARKET_OPEN[1]
+    if not close <= hours < reopen:
+        return None
+    start_of_hour = now.replace(minute=0, second=0, microsecond=0)
+    return start_of_hour + timedelta(hours=reopen - hours)
+
+
+def next_interval(interval: int, active: bool) -> int:
+    """Polling interval in seconds after a sync, given the previous one and whether the account was active."""
+    if active:
+        return settings.MT5_SYNC_MIN_INTERVAL
+    interval = max(interval or settings.MT5_SYNC_MIN_INTERVAL, settings.MT5_SYNC_MIN_INTERVAL)
+    return min(int(interval * settings.MT5_SYNC_BACKOFF), settings.MT5_SYNC_MAX_INTERVAL)
+
+
+def schedule_next(account, active: bool, now: datetime = None):
+    """Store the next sync time of an account after a successful sync.
+
+    Args:
+        account (Account): The synced account
+        active (bool): Whether the sync found new deals, open positions or pending orders
+        now (datetime): The current time, ``timezone.now()`` by default
+    """
+    now = now or timezone.now()
+    interval = next_interval(account.sync_interval, active)
+    next_sync_at = now + timedelta(seconds=interval)
+
+    reopens_at = market_reopens_at(now)
+    if reopens_at is not None:
+        interval = settings.MT5_SYNC_MAX_INTERVAL
+        next_sync_at = min(now + timedelta(seconds=interval), reopens_at)
+
+    account.sync_interval = interval
+    account.next_sync_at = next_sync_at
+    type(account).objects.filter(id=account.id).update(sync_interval=interval, next_sync_at=next_sync_at)
+
+
+def nudge(account, now: datetime = None):
+    """Make an account due right away and poll it at the shortest interval again, for "sync now" requests."""
+    now = now or timezone.now()
+    account.sync_interval = settings.MT5_SYNC_MIN_INTERVAL
+    account.next_sync_at = now
+    type(account).objects.filter(id=account.id).update(sync_interval=account.sync_interval, next_sync_at=now)
+
+
+def due(queryset, now: datetime = None):
+    """Ids of the accounts of ``queryset`` due for a sync, leased for DISPATCH_LEASE so they are dispatched once."""
+    now = now or timezone.now()
+    account_ids = list(queryset.filter(Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now))
+                       .values_list("id", flat=True))
+    queryset.filter(id__in=account_ids).update(next_sync_at=now + DISPATCH_LEASE)
+    return account_ids
@@ -531,6 +531,27 @@ class OrderSendResultSerializer(serializers.Serializer):
     retcode_external = serializers.IntegerField()
     profit = serializers.FloatField()
 
+def _labels(choices):
+    """Value to label table of an MT5 enum, a dict lookup per row instead of an enum instance."""
+    return {value: label for value, label in choices.choices}
+
+ORDER_TYPE_LABELS = _labels(OrderType)
+ORDER_TIME_LABELS = _labels(OrderTime)
+ORDER_FILLING_LABELS = _labels(OrderFilling)
+ORDER_STATE_LABELS = _labels(OrderState)
+ORDER_REASON_LABELS = _labels(OrderReason)
+POSITION_REASON_LABELS = _labels(PositionReason)
+DEAL_TYPE_LABELS = _labels(DealType)
+DEAL_ENTRY_LABELS = _labels(DealEntry)
+DEAL_REASON_LABELS = _labels(DealReason)
+
+def _row(instance):
+    """The journal serializers read raw pymongo dicts (``as_pymongo()``) as well as mongoengine documents."""
+    return instance if isinstance(instance, dict) else instance._data
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp or 0, timezone.utc)
+
 class TradePositionSerializer(serializers.Serializer):
     ticket = serializers.IntegerField()
     time = serializers.IntegerField()
@@ -552,25 +573,29 @@ class TradePositionSerializer(serializers.Serializer):
     comment = serializers.CharField()
     external_id = serializers.CharField()
 
+    projection = ("ticket", "time", "time_update", "type", "magic", "identifier", "reason", "volume", "price_open",
+                  "sl", "tp", "price_current", "swap", "profit", "symbol", "comment", "external_id")
+
     def to_representation(self, instance):
+        row = _row(instance)
         return {
-            "ticket": instance.ticket,
-            'time': datetime.fromtimestamp(instance.time, timezone.utc),
-            'time_update': datetime.fromtimestamp(instance.time_update, timezone.utc),
-            'type': OrderType(instance.type).label,
-            'magic': instance.magic,
-            'identifier': instance.identifier,
-            "reason": PositionReason(instance.reason).label,
-            'volume': instance.volume,
-            'price_open': instance.price_open,
-            'sl': instance.sl,
-            'tp': instance.tp,
-            'price_current': instance.price_current,
-            'swap': instance.swap,
-            'profit': instance.profit,
-            'symbol': instance.symbol,
-            'comment': instance.comment,
-            'external_id': instance.external_id
+            "ticket": row.get('ticket'),
+            'time': _utc(row.get('time')),
+            'time_update': _utc(row.get('time_update')),
+            'type': ORDER_TYPE_LABELS.get(row.get('type')),
+            'magic': row.get('magic'),
+            'identifier': row.get('identifier'),
+            "reason": POSITION_REASON_LABELS.get(row.get('reason')),
+            'volume': row.get('volume'),
+            'price_open': row.get('price_open'),
+            'sl': row.get('sl'),
+            'tp': row.get('tp'),
+            'price_current': row.get('price_current'),
+            'swap': row.get('swap'),
+            'profit': row.get('profit'),
+            'symbol': row.get('symbol'),
+            'comment': row.get('comment'),
+            'external_id': row.get('external_id')
         }
 
 class OrdersSerializer(serializers.Serializer):
@@ -599,29 +624,34 @@ class OrdersSerializer(serializers.Serializer):
     comment = serializers.CharField()
     external_id = serializers.CharField()
 
+    projection = ("ticket", "time_setup", "time_done", "type", "type_time", "type_filling", "state", "magic",
+                  "position_id", "position_by_id", "reason", "volume_current", "volume_initial", "price_open", "sl",
+                  "tp", "price_current", "price_stoplimit", "symbol", "comment", "external_id")
+
     def to_representation(self, instance):
+        row = _row(instance)
         return {
-            'ticket': instance.ticket,
-            'time': datetime.fromtimestamp(instance.time_setup, timezone.utc),
-            'time_done': datetime.fromtimestamp(instance.time_done, timezone.utc),
-            'type': OrderType(instance.type).label,
-            'type_time': OrderTime(instance.type_time).label,
-            'type_filling': OrderFilling(instance.type_filling).label,
-            'state': OrderState(instance.state).label,
-            'magic': instance.magic,
-            'position_id': instance.position_id,
-            'position_by_id': instance.position_by_id,
-            'reason': OrderReason(instance.reason).label,
-            'volume_current': instance.volume_current,
-            'volume_initial': instance.volume_initial,
-            'price_open': instance.price_open,
-            'sl': instance.sl,
-            'tp': instance.tp,
-            'price_current': instance.price_current,
-            'price_stoplimit': instance.price_stoplimit,
-            'symbol': instance.symbol,
-            'comment': instance.comment,
-            'external_id': instance.external_id
+            'ticket': row.get('ticket'),
+            'time': _utc(row.get('time_setup')),
+            'time_done': _utc(row.get('time_done')),
+            'type': ORDER_TYPE_LABELS.get(row.get('type')),
+            'type_time': ORDER_TIME_LABELS.get(row.get('type_time')),
+            'type_filling': ORDER_FILLING_LABELS.get(row.get('type_filling')),
+            'state': ORDER_STATE_LABELS.get(row.get('state')),
+            'magic': row.get('magic'),
+            'position_id': row.get('position_id'),
+            'position_by_id': row.get('position_by_id'),
+            'reason': ORDER_REASON_LABELS.get(row.get('reason')),
+            'volume_current': row.get('volume_current'),
+            'volume_initial': row.get('volume_initial'),
+            'price_open': row.get('price_open'),
+            'sl': row.get('sl'),
+            'tp': row.get('tp'),
+            'price_current': row.get('price_current'),
+            'price_stoplimit': row.get('price_stoplimit'),
+            'symbol': row.get('symbol'),
+            'comment': row.get('comment'),
+            'external_id': row.get('external_id')
         }
 
         
@@ -645,25 +675,29 @@ class HistoryDealsSerializer(serializers.Serializer):
     comment = serializers.CharField()
     external_id = serializers.CharField()
 
+    projection = ("ticket", "order", "time", "type", "entry", "magic", "position_id", "reason", "volume", "price",
+                  "commission", "swap", "profit", "fee", "symbol", "comment", "external_id")
+
     def to_representation(self, instance):
+        row = _row(instance)
         return {
-            'ticket': instance.ticket,
-            'order': instance.order,
-            'time': datetime.fromtimestamp(instance.time, timezone.utc),
-            'type': DealType(instance.type).label,
-            'entry': DealEntry(instance.entry).label,
-            'magic': instance.magic,
-            'position_id': instance.position_id,
-            "reason": DealReason(instance.reason).label,
-            'volume': instance.volume,
-            'price': instance.price,
-            'commission': instance.commission,
-            'swap': instance.swap,            
-            'profit': instance.profit,
-            'fee': instance.fee,
-            'symbol': instance.symbol,
-            'comment': instance.comment,
-            'external_id': instance.external_id
+            'ticket': row.get('ticket'),
+            'order': row.get('order'),
+            'time': _utc(row.get('time')),
+            'type': DEAL_TYPE_LABELS.get(row.get('type')),
+            'entry': DEAL_ENTRY_LABELS.get(row.get('entry')),
+            'magic': row.get('magic'),
+            'position_id': row.get('position_id'),
+            "reason": DEAL_REASON_LABELS.get(row.get('reason')),
+            'volume': row.get('volume'),
+            'price': row.get('price'),
+            'commission': row.get('commission'),
+            'swap': row.get('swap'),
+            'profit': row.get('profit'),
+            'fee': row.get('fee'),
+            'symbol': row.get('symbol'),
+            'comment': row.get('comment'),
+            'external_id': row.get('external_id')
         }
 
 class MembershipSerializer(serializers.ModelSerializer):
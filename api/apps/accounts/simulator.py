@@ -0,0 +1,596 @@
+"""Pure Python stand-in for the ``MetaTrader5`` package, served over rpyc by the ``mt5_simulator`` command.
+
+``mt5linux.MetaTrader5`` runs ``import MetaTrader5 as mt5`` on the RPC server and evaluates ``mt5.<function>(...)``
+there, so installing this module as ``MetaTrader5`` in a classic rpyc server is enough for ``Account`` and the sync
+task to run against it without Wine or a terminal.
+
+Every answer is generated deterministically from the seed, the account login and the time:
+
+* one round-trip trade per ``trade_interval`` seconds since ``history_start``, a trade is an open position while
+  its exit time is in the future, plus the initial deposit;
+* a pending limit order every few intervals;
+* prices are a smooth function of the symbol and time, so rates and ticks of any range agree between calls.
+
+Calls can be slowed down with ``latency`` and ``jitter`` and failed at random with ``error_rate``. Logins on a
+server listed in ``down_servers`` time out, passwords starting with ``invalid`` are rejected.
+"""
+
+import fnmatch
+import random
+import threading
+import time as _time
+import zlib
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache, wraps
+
+import numpy as np
+
+from .bars import RATES_DTYPE
+from .mt5 import *  # noqa: F401,F403 the MetaTrader5 package exposes the same constants
+from .mt5 import SymbolInfo as _SymbolInfoSpec, TerminalInfo as _TerminalInfoSpec
+
+__author__ = "RealJournals"
+__version__ = "5.0.4200"
+
+AccountInfo = namedtuple("AccountInfo", [
+    "login", "trade_mode", "leverage", "limit_orders", "margin_so_mode", "trade_allowed", "trade_expert",
+    "margin_mode", "currency_digits", "fifo_close", "balance", "credit", "profit", "equity", "margin",
+    "margin_free", "margin_level", "margin_so_call", "margin_so_so", "margin_initial", "margin_maintenance",
+    "assets", "liabilities", "commission_blocked", "name", "server", "currency", "company"])
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id", "reason", "volume", "price",
+    "commission", "swap", "profit", "fee", "symbol", "comment", "external_id"])
+TradeOrder = namedtuple("TradeOrder", [
+    "ticket", "time_setup", "time_setup_msc", "time_done", "time_done_msc", "time_expiration", "type", "type_time",
+    "type_filling", "state", "magic", "position_id", "position_by_id", "reason", "volume_initial", "volume_current",
+    "price_open", "sl", "tp", "price_current", "price_stoplimit", "symbol", "comment", "external_id"])
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic", "identifier", "reason",
+    "volume", "price_open", "sl", "tp", "price_current", "swap", "profit", "symbol", "comment", "external_id"])
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real"])
+SymbolInfo = namedtuple("SymbolInfo", list(_SymbolInfoSpec.__annotations__))
+TerminalInfo = namedtuple("TerminalInfo", list(_TerminalInfoSpec.__annotations__))
+
+TICKS_DTYPE = np.dtype([("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+                        ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8")])
+
+# name: (price, digits, contract size, spread in points, base currency, profit currency, description)
+SYMBOLS = {
+    "EURUSD": (1.08, 5, 100000, 12, "EUR", "USD", "Euro vs US Dollar"),
+    "GBPUSD": (1.27, 5, 100000, 15, "GBP", "USD", "Great Britain Pound vs US Dollar"),
+    "USDJPY": (150.0, 3, 100000, 14, "USD", "JPY", "US Dollar vs Japanese Yen"),
+    "XAUUSD": (2000.0, 2, 100, 25, "XAU", "USD", "Gold vs US Dollar"),
+    "US30": (38000.0, 1, 1, 20, "USD", "USD", "Dow Jones Industrial Average"),
+    "BTCUSD": (60000.0, 2, 1, 1500, "BTC", "USD", "Bitcoin vs US Dollar"),
+}
+VOLUMES = (0.01, 0.05, 0.1, 0.5, 1.0)
+DEPOSIT = 100000.0
+TICK_INTERVAL_MSC = 500
+MAX_BARS = 100000
+# Ticket ranges of the generated deals, orders and positions
+DEAL_TICKETS = 100000000
+ORDER_TICKETS = 200000000
+POSITION_TICKETS = 300000000
+PENDING_TICKETS = 400000000
+
+RES_S_OK = (1, "Success")
+RES_E_FAIL = (-1, "Terminal: Call failed")
+RES_E_INVALID_PARAMS = (-2, "Terminal: Invalid params")
+RES_E_AUTH_FAILED = (-6, "Terminal: Authorization failed")
+RES_E_INTERNAL_FAIL_CONNECT = (-10004, "No IPC connection")
+RES_E_INTERNAL_FAIL_TIMEOUT = (-10005, "IPC timeout")
+
+config = {
+    "seed": 0,
+    "latency": 0.0,
+    "jitter": 0.0,
+    "error_rate": 0.0,
+    "history_start": int(datetime(2023, 1, 1).timestamp()),
+    "trade_interval": 4 * 60 * 60,
+    "down_servers": set(),
+}
+
+# Terminal wide state, like the real package: one logged in account per terminal process
+_state = {"initialized": False, "login": None, "server": "", "error": RES_S_OK}
+_lock = threading.RLock()
+_errors = random.Random(0)
+
+
+def configure(**options):
+    """Update the simulator ``config`` and drop everything generated with the previous one."""
+    global _errors
+    with _lock:
+        config.update(options)
+        _errors = random.Random(config["seed"])
+        _trade.cache_clear()
+        _balance.cache_clear()
+
+
+def _fail(error: tuple):
+    _state["error"] = error
+    return None
+
+
+def terminal_call(requires_login: bool = True):
+    """Apply the configured latency and error injection, and the initialization check, to a simulated call."""
+    def _decorator(function):
+        @wraps(function)
+        def _call(*args, **kwargs):
+            delay = config["latency"] + random.uniform(0, config["jitter"])
+            if delay:
+                _time.sleep(delay)
+            with _lock:
+                if config["error_rate"] and _errors.random() < config["error_rate"]:
+                    return _fail(RES_E_INTERNAL_FAIL_TIMEOUT)
+                if requires_login and not _state["initialized"]:
+                    return _fail(RES_E_INTERNAL_FAIL_CONNECT)
+                _state["error"] = RES_S_OK
+                return function(*args, **kwargs)
+        return _call
+    return _decorator
+
+
+def _timestamp(value) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def _now() -> int:
+    return int(_time.time())
+
+
+def _matches(symbol: str, group: str) -> bool:
+    """MT5 group filter: comma separated patterns, the ones starting with ``!`` exclude."""
+    if not group:
+        return True
+    selected = False
+    for pattern in group.split(","):
+        pattern = pattern.strip()
+        if pattern.startswith("!"):
+            if fnmatch.fnmatch(symbol, pattern[1:]):
+                return False
+        elif fnmatch.fnmatch(symbol, pattern):
+            selected = True
+    return selected
+
+
+# Prices
+
+def _phase(symbol: str) -> float:
+    return zlib.crc32(symbol.encode()) % 1000 / 1000 * 2 * np.pi
+
+
+def _noise(values, phase: float):
+    """Deterministic pseudo random values in [-1, 1) of integer inputs."""
+    x = np.sin(np.asarray(values, dtype=np.float64) % 1000003 * 12.9898 + phase) * 43758.5453
+    return (x - np.floor(x)) * 2 - 1
+
+
+def price_at(symbol: str, times):
+    """Bid price of ``symbol`` at the given unix times, a smooth wave plus per minute noise."""
+    base, digits = SYMBOLS[symbol][:2]
+    phase = _phase(symbol)
+    t = np.asarray(times, dtype=np.float64)
+    price = base * (1
+                    + 0.03 * np.sin(2 * np.pi * t / (30 * 86400) + phase)
+                    + 0.008 * np.sin(2 * np.pi * t / 86400 + 2 * phase)
+                    + 0.0005 * _noise(t // 60, phase))
+    return np.round(price, digits)
+
+
+def _point(symbol: str) -> float:
+    return 10 ** -SYMBOLS[symbol][1]
+
+
+def _bars(symbol: str, timeframe: int, times) -> np.ndarray:
+    seconds = TimeFrame(timeframe).time
+    times = np.asarray(times, dtype=np.int64)
+    phase = _phase(symbol)
+    spread = SYMBOLS[symbol][3]
+
+    rates = np.empty(times.size, dtype=RATES_DTYPE)
+    rates["time"] = times
+    rates["open"] = price_at(symbol, times)
+    rates["close"] = price_at(symbol, times + seconds - 1)
+    wick = SYMBOLS[symbol][0] * 0.0004 * np.sqrt(seconds / 60)
+    high = np.maximum(rates["open"], rates["close"]) + np.abs(_noise(times, phase + 1)) * wick
+    low = np.minimum(rates["open"], rates["close"]) - np.abs(_noise(times, phase + 2)) * wick
+    rates["high"] = np.round(high, SYMBOLS[symbol][1])
+    rates["low"] = np.round(low, SYMBOLS[symbol][1])
+    rates["tick_volume"] = (1 + np.abs(_noise(times, phase + 3))) * seconds / 2
+    rates["spread"] = spread
+    rates["real_volume"] = 0
+    return rates
+
+
+def _ticks(symbol: str, times_msc) -> np.ndarray:
+    times_msc = np.asarray(times_msc, dtype=np.int64)
+    ticks = np.empty(times_msc.size, dtype=TICKS_DTYPE)
+    ticks["time"] = times_msc // 1000
+    ticks["time_msc"] = times_msc
+    ticks["bid"] = price_at(symbol, times_msc / 1000)
+    ticks["ask"] = np.round(ticks["bid"] + SYMBOLS[symbol][3] * _point(symbol), SYMBOLS[symbol][1])
+    ticks["last"] = 0
+    ticks["volume"] = 0
+    ticks["flags"] = TICK_FLAG_BID | TICK_FLAG_ASK
+    ticks["volume_real"] = 0
+    return ticks
+
+
+# Trades
+
+@lru_cache(maxsize=100000)
+def _trade(login: int, k: int) -> dict:
+    """The round-trip trade of interval ``k`` of an account."""
+    interval = config["trade_interval"]
+    rng = random.Random("{}:{}:{}".format(config["seed"], login, k))
+    symbol = rng.choice(sorted(SYMBOLS))
+    contract_size = SYMBOLS[symbol][2]
+    side = rng.randint(0, 1)
+    volume = rng.choice(VOLUMES)
+    entry_time = config["history_start"] + k * interval + rng.randint(0, interval // 2)
+    exit_time = entry_time + rng.randint(60, 3 * interval)
+    entry_price = float(price_at(symbol, entry_time))
+    exit_price = float(price_at(symbol, exit_time))
+    direction = 1 if side == POSITION_TYPE_BUY else -1
+    profit = round((exit_price - entry_price) * direction * volume * contract_size, 2)
+    if SYMBOLS[symbol][5] == "JPY":
+        profit = round(profit / exit_price, 2)
+    days = (exit_time - entry_time) // 86400
+    return {
+        "k": k, "symbol": symbol, "side": side, "volume": volume,
+        "entry_time": entry_time, "exit_time": exit_time, "entry_price": entry_price, "exit_price": exit_price,
+        "profit": profit, "commission": round(-3.5 * volume, 2), "swap": round(-0.5 * volume * days, 2),
+        "magic": rng.choice((0, 0, 1001)), "entry_msc": rng.randint(0, 999), "exit_msc": rng.randint(0, 999),
+    }
+
+
+def _interval_of(t: int) -> int:
+    return (t - config["history_start"]) // config["trade_interval"]
+
+
+def _trades_between(login: int, date_from: int, date_to: int):
+    """Trades with an entry or exit in ``[date_from, date_to]``, a trade lasts at most 3.5 intervals."""
+    first = max(0, _interval_of(date_from) - 4)
+    last = _interval_of(date_to)
+    return [_trade(login, k) for k in range(first, last + 1)]
+
+
+def _deal(login: int, trade: dict, exit: bool) -> TradeDeal:
+    side = trade["side"] if not exit else 1 - trade["side"]
+    when = trade["exit_time"] if exit else trade["entry_time"]
+    msc = trade["exit_msc"] if exit else trade["entry_msc"]
+    return TradeDeal(
+        ticket=DEAL_TICKETS + 2 * trade["k"] + exit, order=ORDER_TICKETS + 2 * trade["k"] + exit, time=when,
+        time_msc=when * 1000 + msc, type=side, entry=DEAL_ENTRY_OUT if exit else DEAL_ENTRY_IN,
+        magic=trade["magic"], position_id=POSITION_TICKETS + trade["k"],
+        reason=DEAL_REASON_EXPERT if trade["magic"] else DEAL_REASON_CLIENT, volume=trade["volume"],
+        price=trade["exit_price"] if exit else trade["entry_price"], commission=trade["commission"],
+        swap=trade["swap"] if exit else 0.0, profit=trade["profit"] if exit else 0.0, fee=0.0,
+        symbol=trade["symbol"], comment="sim", external_id="")
+
+
+def _deposit(login: int) -> TradeDeal:
+    start = config["history_start"]
+    return TradeDeal(ticket=DEAL_TICKETS - 1, order=0, time=start, time_msc=start * 1000, type=DEAL_TYPE_BALANCE,
+                     entry=DEAL_ENTRY_IN, magic=0, position_id=0, reason=DEAL_REASON_CLIENT, volume=0.0, price=0.0,
+                     commission=0.0, swap=0.0, profit=DEPOSIT, fee=0.0, symbol="", comment="Deposit",
+                     external_id="")
+
+
+def _history_deals(login: int, date_from: int, date_to: int) -> list:
+    date_to = min(date_to, _now())
+    deals = []
+    if date_from <= config["history_start"] <= date_to:
+        deals.append(_deposit(login))
+    for trade in _trades_between(login, date_from, date_to):
+        if date_from <= trade["entry_time"] <= date_to:
+            deals.append(_deal(login, trade, False))
+        if date_from <= trade["exit_time"] <= date_to:
+            deals.append(_deal(login, trade, True))
+    return sorted(deals, key=lambda deal: deal.time_msc)
+
+
+def _history_order(deal: TradeDeal) -> TradeOrder:
+    setup_msc = deal.time_msc - 150
+    return TradeOrder(
+        ticket=deal.order, time_setup=setup_msc // 1000, time_setup_msc=setup_msc, time_done=deal.time,
+        time_done_msc=deal.time_msc, time_expiration=0, type=deal.type, type_time=ORDER_TIME_GTC,
+        type_filling=ORDER_FILLING_FOK, state=ORDER_STATE_FILLED, magic=deal.magic, position_id=deal.position_id,
+        position_by_id=0, reason=deal.reason, volume_initial=deal.volume, volume_current=0.0, price_open=deal.price,
+        sl=0.0, tp=0.0, price_current=deal.price, price_stoplimit=0.0, symbol=deal.symbol, comment=deal.comment,
+        external_id="")
+
+
+def _open_trades(login: int, now: int) -> list:
+    return [trade for trade in _trades_between(login, now, now) if trade["entry_time"] <= now < trade["exit_time"]]
+
+
+def _floating(trade: dict, now: int) -> float:
+    price = float(price_at(trade["symbol"], now))
+    direction = 1 if trade["side"] == POSITION_TYPE_BUY else -1
+    profit = (price - trade["entry_price"]) * direction * trade["volume"] * SYMBOLS[trade["symbol"]][2]
+    if SYMBOLS[trade["symbol"]][5] == "JPY":
+        profit /= price
+    return round(profit, 2)
+
+
+@lru_cache(maxsize=1024)
+def _balance(login: int, until: int) -> float:
+    """Deposit plus the net profit of the trades closed by interval ``until``."""
+    balance = DEPOSIT
+    for k in range(0, until + 1):
+        trade = _trade(login, k)
+        if trade["exit_time"] <= _now():
+            balance += trade["profit"] + 2 * trade["commission"] + trade["swap"]
+    return round(balance, 2)
+
+
+# MetaTrader5 functions
+
+@terminal_call(requires_login=False)
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    _state["initialized"] = True
+    if login is None:
+        return True
+    return login_(login, password=password, server=server, timeout=timeout)
+
+
+def login_(login, password=None, server=None, timeout=None):
+    if server in config["down_servers"]:
+        _time.sleep(min((timeout or 60000) / 1000, 5))
+        _state["login"] = None
+        return _fail(RES_E_INTERNAL_FAIL_TIMEOUT) or False
+    if password and str(password).startswith("invalid"):
+        _state["login"] = None
+        return _fail(RES_E_AUTH_FAILED) or False
+    _state["login"] = int(login)
+    _state["server"] = server or "Simulator-Server"
+    return True
+
+
+@terminal_call()
+def login(login, password=None, server=None, timeout=None):
+    return login_(login, password=password, server=server, timeout=timeout)
+
+
+@terminal_call(requires_login=False)
+def shutdown():
+    _state.update(initialized=False, login=None)
+    return True
+
+
+@terminal_call(requires_login=False)
+def version():
+    return 500, 4200, "01 Feb 2024"
+
+
+def last_error():
+    return _state["error"]
+
+
+@terminal_call()
+def terminal_info():
+    values = {field: 0 for field in TerminalInfo._fields}
+    values.update(connected=True, trade_allowed=True, build=4200, maxbars=MAX_BARS, company="RealJournals",
+                  name="MetaTrader 5 Simulator", language="English", path="", data_path="", commondata_path="")
+    return TerminalInfo(**values)
+
+
+@terminal_call()
+def account_info():
+    account = _state["login"]
+    if account is None:
+        return _fail(RES_E_AUTH_FAILED)
+    now = _now()
+    open_trades = _open_trades(account, now)
+    balance = _balance(account, _interval_of(now))
+    profit = round(sum(_floating(trade, now) for trade in open_trades), 2)
+    margin = round(sum(trade["volume"] * SYMBOLS[trade["symbol"]][2] * trade["entry_price"] / 100
+                       for trade in open_trades if SYMBOLS[trade["symbol"]][5] == "USD"), 2)
+    equity = round(balance + profit, 2)
+    return AccountInfo(
+        login=account, trade_mode=ACCOUNT_TRADE_MODE_DEMO, leverage=100, limit_orders=200,
+        margin_so_mode=ACCOUNT_STOPOUT_MODE_PERCENT, trade_allowed=True, trade_expert=True,
+        margin_mode=ACCOUNT_MARGIN_MODE_RETAIL_HEDGING, currency_digits=2, fifo_close=False, balance=balance,
+        credit=0.0, profit=profit, equity=equity, margin=margin, margin_free=round(equity - margin, 2),
+        margin_level=round(equity / margin * 100, 2) if margin else 0.0, margin_so_call=50.0, margin_so_so=30.0,
+        margin_initial=0.0, margin_maintenance=0.0, assets=0.0, liabilities=0.0, commission_blocked=0.0,
+        name="Simulated {}".format(account), server=_state["server"], currency="USD",
+        company="RealJournals Simulator")
+
+
+def _symbol_info(name: str) -> SymbolInfo:
+    price, digits, contract_size, spread, base, profit, description = SYMBOLS[name]
+    bid = float(price_at(name, _now()))
+    ask = round(bid + spread * _point(name), digits)
+    values = {field: 0 for field in SymbolInfo._fields}
+    values.update(
+        select=True, visible=True, time=_now(), digits=digits, spread=spread, spread_float=True,
+        trade_mode=SYMBOL_TRADE_MODE_FULL, trade_exemode=SYMBOL_TRADE_EXECUTION_MARKET, filling_mode=1,
+        order_mode=127, bid=bid, bidhigh=bid, bidlow=bid, ask=ask, askhigh=ask, asklow=ask, point=_point(name),
+        trade_tick_value=1.0, trade_tick_size=_point(name), trade_contract_size=float(contract_size),
+        volume_min=0.01, volume_max=100.0, volume_step=0.01, currency_base=base, currency_profit=profit,
+        currency_margin=base, description=description, name=name, path="Simulator\\{}".format(name),
+        basis="", category="", bank="", exchange="", formula="", isin="", page="")
+    return SymbolInfo(**values)
+
+
+@terminal_call()
+def symbols_total():
+    return len(SYMBOLS)
+
+
+@terminal_call()
+def symbols_get(group=None):
+    return tuple(_symbol_info(name) for name in sorted(SYMBOLS) if _matches(name, group))
+
+
+@terminal_call()
+def symbol_info(symbol):
+    if symbol not in SYMBOLS:
+        return _fail(RES_E_INVALID_PARAMS)
+    return _symbol_info(symbol)
+
+
+@terminal_call()
+def symbol_info_tick(symbol):
+    if symbol not in SYMBOLS:
+        return _fail(RES_E_INVALID_PARAMS)
+    now_msc = _now() * 1000 // TICK_INTERVAL_MSC * TICK_INTERVAL_MSC
+    return Tick(*_ticks(symbol, [now_msc])[0].tolist())
+
+
+@terminal_call()
+def symbol_select(symbol, enable=True):
+    return symbol in SYMBOLS
+
+
+def _rates(symbol, timeframe, times):
+    if symbol not in SYMBOLS:
+        return _fail(RES_E_INVALID_PARAMS)
+    return _bars(symbol, timeframe, times[-MAX_BARS:])
+
+
+def _bar_time(t: int, timeframe: int) -> int:
+    seconds = TimeFrame(timeframe).time
+    return t // seconds * seconds
+
+
+@terminal_call()
+def copy_rates_from(symbol, timeframe, date_from, count):
+    seconds = TimeFrame(timeframe).time
+    last = _bar_time(min(_timestamp(date_from), _now()), timeframe)
+    return _rates(symbol, timeframe, last - seconds * np.arange(int(count) - 1, -1, -1))
+
+
+@terminal_call()
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    seconds = TimeFrame(timeframe).time
+    last = _bar_time(_now(), timeframe) - int(start_pos) * seconds
+    return _rates(symbol, timeframe, last - seconds * np.arange(int(count) - 1, -1, -1))
+
+
+@terminal_call()
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    seconds = TimeFrame(timeframe).time
+    first = -(-_timestamp(date_from) // seconds) * seconds
+    last = _bar_time(min(_timestamp(date_to), _now()), timeframe)
+    return _rates(symbol, timeframe, np.arange(first, last + 1, seconds))
+
+
+@terminal_call()
+def copy_ticks_from(symbol, date_from, count, flags):
+    if symbol not in SYMBOLS:
+        return _fail(RES_E_INVALID_PARAMS)
+    first = -(-_timestamp(date_from) * 1000 // TICK_INTERVAL_MSC) * TICK_INTERVAL_MSC
+    times = first + TICK_INTERVAL_MSC * np.arange(int(count))
+    return _ticks(symbol, times[times <= _now() * 1000])
+
+
+@terminal_call()
+def copy_ticks_range(symbol, date_from, date_to, flags):
+    if symbol not in SYMBOLS:
+        return _fail(RES_E_INVALID_PARAMS)
+    first = -(-_timestamp(date_from) * 1000 // TICK_INTERVAL_MSC) * TICK_INTERVAL_MSC
+    last = min(_timestamp(date_to), _now()) * 1000
+    return _ticks(symbol, np.arange(first, last + 1, TICK_INTERVAL_MSC))
+
+
+@terminal_call()
+def positions_total():
+    return len(_open_trades(_state["login"], _now()))
+
+
+@terminal_call()
+def positions_get(symbol=None, group=None, ticket=None):
+    account, now = _state["login"], _now()
+    positions = []
+    for trade in _open_trades(account, now):
+        if (symbol and trade["symbol"] != symbol) or not _matches(trade["symbol"], group):
+            continue
+        position_id = POSITION_TICKETS + trade["k"]
+        if ticket and int(ticket) != position_id:
+            continue
+        entry_msc = trade["entry_time"] * 1000 + trade["entry_msc"]
+        positions.append(TradePosition(
+            ticket=position_id, time=trade["entry_time"], time_msc=entry_msc, time_update=trade["entry_time"],
+            time_update_msc=entry_msc, type=trade["side"], magic=trade["magic"], identifier=position_id,
+            reason=POSITION_REASON_EXPERT if trade["magic"] else POSITION_REASON_CLIENT, volume=trade["volume"],
+            price_open=trade["entry_price"], sl=0.0, tp=0.0, price_current=float(price_at(trade["symbol"], now)),
+            swap=0.0, profit=_floating(trade, now), symbol=trade["symbol"], comment="sim", external_id=""))
+    return tuple(positions)
+
+
+@terminal_call()
+def orders_total():
+    return len(orders_get.__wrapped__())
+
+
+@terminal_call()
+def orders_get(symbol=None, group=None, ticket=None):
+    account, now = _state["login"], _now()
+    interval = config["trade_interval"]
+    orders = []
+    for k in range(max(0, _interval_of(now) - 2), _interval_of(now) + 1):
+        rng = random.Random("{}:{}:pending:{}".format(config["seed"], account, k))
+        if rng.random() < 0.5:
+            continue
+        name = rng.choice(sorted(SYMBOLS))
+        placed = config["history_start"] + k * interval + rng.randint(0, interval)
+        expires = placed + 2 * interval
+        if not placed <= now < expires or (symbol and name != symbol) or not _matches(name, group):
+            continue
+        if ticket and int(ticket) != PENDING_TICKETS + k:
+            continue
+        side = rng.randint(0, 1)
+        price = float(price_at(name, now))
+        orders.append(TradeOrder(
+            ticket=PENDING_TICKETS + k, time_setup=placed, time_setup_msc=placed * 1000, time_done=0,
+            time_done_msc=0, time_expiration=expires, type=ORDER_TYPE_BUY_LIMIT + side,
+            type_time=ORDER_TIME_SPECIFIED, type_filling=ORDER_FILLING_RETURN, state=ORDER_STATE_PLACED, magic=0,
+            position_id=0, position_by_id=0, reason=ORDER_REASON_CLIENT, volume_initial=rng.choice(VOLUMES),
+            volume_current=0.0, price_open=round(price * (0.998 if side == 0 else 1.002), SYMBOLS[name][1]),
+            sl=0.0, tp=0.0, price_current=price, price_stoplimit=0.0, symbol=name, comment="sim",
+            external_id=""))
+    return tuple(orders)
+
+
+@terminal_call()
+def history_deals_total(date_from, date_to):
+    return len(_history_deals(_state["login"], _timestamp(date_from), _timestamp(date_to)))
+
+
+@terminal_call()
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    account = _state["login"]
+    if ticket:
+        k, exit = divmod(int(ticket) - DEAL_TICKETS, 2)
+        deals = [_deal(account, _trade(account, k), bool(exit))] if k >= 0 else []
+    elif position:
+        trade = _trade(account, int(position) - POSITION_TICKETS)
+        deals = [_deal(account, trade, False), _deal(account, trade, True)]
+    elif date_from is None or date_to is None:
+        return _fail(RES_E_INVALID_PARAMS)
+    else:
+        deals = _history_deals(account, _timestamp(date_from), _timestamp(date_to))
+    now = _now()
+    return tuple(deal for deal in deals if deal.time <= now and _matches(deal.symbol, group))
+
+
+@terminal_call()
+def history_orders_total(date_from, date_to):
+    return len(history_orders_get.__wrapped__(date_from, date_to))
+
+
+@terminal_call()
+def history_orders_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    if ticket:
+        deals = history_deals_get.__wrapped__(ticket=int(ticket) - ORDER_TICKETS + DEAL_TICKETS)
+    else:
+        deals = history_deals_get.__wrapped__(date_from, date_to, group=group, position=position)
+    if deals is None:
+        return None
+    return tuple(_history_order(deal) for deal in deals if deal.order)
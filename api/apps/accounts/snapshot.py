@@ -0,0 +1,61 @@
+"""Everything the journals need from an MT5 account, pulled in a single terminal session."""
+
+from logging import getLogger
+
+from apps.journals import services as journals_services
+
+logger = getLogger(__name__)
+
+
+class AccountSnapshot:
+    """Account info, history window, open positions and pending orders of an account, as dicts.
+
+    Built by ``Account.snapshot()`` from one MT5 session, or from the ``create_trades`` payload.
+
+    Attributes:
+        account_info (dict): The account info, None when not part of the snapshot
+        history_deals (list[dict]): Deals of the history window
+        history_orders (list[dict]): Orders of the history window
+        positions (list[dict]): All open positions, None to keep the stored ones
+        orders (list[dict]): All pending orders, None to keep the stored ones
+        date_from (int): History window start, as a unix timestamp
+        date_to (int): History window end, as a unix timestamp
+    """
+    __slots__ = ("account_info", "history_deals", "history_orders", "positions", "orders", "date_from", "date_to")
+
+    def __init__(self, account_info: dict = None, history_deals: list = (), history_orders: list = (),
+                 positions: list = None, orders: list = None, date_from: int = None, date_to: int = None):
+        self.account_info = account_info
+        self.history_deals = list(history_deals)
+        self.history_orders = list(history_orders)
+        self.positions = positions
+        self.orders = orders
+        self.date_from = date_from
+        self.date_to = date_to
+
+    def __repr__(self):
+        return "<AccountSnapshot {} deals, {} orders, {} positions, {} pending orders>".format(
+            len(self.history_deals), len(self.history_orders),
+            "-" if self.positions is None else len(self.positions), "-" if self.orders is None else len(self.orders))
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the account has open positions or pending orders."""
+        return bool(self.positions or self.orders)
+
+    def store(self, account_id: int, tz: str = "UTC") -> dict:
+        """Upsert the history and replace the open positions and pending orders of the account.
+
+        Returns:
+            dict: The write counts of each collection written
+        """
+        results = {
+            "history_deals": journals_services.upsert_history_deals(account_id, self.history_deals, tz),
+            "history_orders": journals_services.upsert_history_orders(account_id, self.history_orders),
+        }
+        if self.positions is not None:
+            results["positions"] = journals_services.replace_positions(account_id, self.positions)
+        if self.orders is not None:
+            results["orders"] = journals_services.replace_orders(account_id, self.orders)
+        logger.info("Account %s snapshot %s..%s: %s", account_id, self.date_from, self.date_to, results)
+        return results
@@ -0,0 +1,165 @@
+"""Synchronisation of MT5 account data into the journals collections."""
+
+import time
+from datetime import datetime, timezone
+from logging import getLogger
+
+from django.conf import settings
+from django.db.models import Q
+
+from apps.journals.models import HistoryDeals, HistoryOrders
+
+from .snapshot import AccountSnapshot
+
+logger = getLogger(__name__)
+
+# MT5 times are in the trade server timezone, the window end looks this far ahead of UTC to cover it
+SERVER_TIME_MARGIN = 24 * 60 * 60
+
+
+def history_watermark(document, account_id: int, time_field: str):
+    """Latest ``<time_field>_msc`` stored for the account, in milliseconds, or None before the first sync.
+
+    The lookup is served by the ``(account, -<time_field>, -ticket)`` index.
+    """
+    msc_field = time_field + "_msc"
+    row = document._get_collection().find_one({"account": account_id}, {time_field: 1, msc_field: 1},
+                                              sort=[(time_field, -1), ("ticket", -1)])
+    if row is None:
+        return None
+    return row.get(msc_field) or row.get(time_field, 0) * 1000
+
+
+def history_start(account) -> int:
+    """Unix timestamp the next history fetch starts from.
+
+    It is MT5_SYNC_OVERLAP seconds before the latest stored deal or order, whichever is older, since the history
+    writes are idempotent upserts the overlap only guards against records that arrive late with an earlier time.
+    Accounts without any stored history start from ``account.start_date``, and a backfill checkpoint past those
+    points skips the windows already fetched.
+    """
+    starts = []
+    for document, time_field in ((HistoryDeals, "time"), (HistoryOrders, "time_setup")):
+        watermark = history_watermark(document, account.id, time_field)
+        if watermark is None:
+            starts.append(int(account.start_date.timestamp()))
+        else:
+            starts.append(watermark // 1000 - settings.MT5_SYNC_OVERLAP)
+    date_from = min(starts)
+
+    if account.history_backfilled_until is not None:
+        date_from = max(date_from, int(account.history_backfilled_until.timestamp()) - settings.MT5_SYNC_OVERLAP)
+    return date_from
+
+
+def history_windows(account, window: int = None):
+    """Consecutive ``(date_from, date_to)`` windows of at most ``window`` seconds, from history_start up to now.
+
+    Steady state syncs are a single window, a new or long idle account walks its history one window at a time.
+    """
+    window = window or settings.MT5_BACKFILL_WINDOW_DAYS * 24 * 60 * 60
+    date_from = history_start(account)
+    end = int(time.time()) + SERVER_TIME_MARGIN
+    while True:
+        date_to = min(date_from + window, end)
+        yield date_from, date_to
+        if date_to >= end:
+            return
+        date_from = date_to
+
+
+def _advance(account, field: str, value: datetime):
+    """Set ``account.<field>`` to ``value`` unless it is already past it.
+
+    A single row UPDATE, so a failed or concurrent sync can not move it backwards.
+    """
+    behind = Q(**{field + "__isnull": True}) | Q(**{field + "__lt": value})
+    if type(account).objects.filter(behind, id=account.id).update(**{field: value}):
+        setattr(account, field, value)
+
+
+def advance_watermark(account, field: str, rows: list, time_field: str):
+    """Record the latest fetched ``<time_field>_msc`` in ``account.<field>`` once the rows are written."""
+    msc_field = time_field + "_msc"
+    times = [row.get(msc_field) or row.get(time_field, 0) * 1000 for row in rows]
+    if times:
+        _advance(account, field, datetime.fromtimestamp(max(times) / 1000, timezone.utc))
+
+
+def store_history(account, date_from: int, date_to: int, snapshot) -> int:
+    """Write a snapshot of the ``[date_from, date_to]`` history window, then checkpoint the window.
+
+    The checkpoint trails the wall clock by SERVER_TIME_MARGIN, as records of a trade server behind UTC can still
+    show up with times before now.
+
+    Returns:
+        int: Number of deals that were not stored yet
+    """
+    results = snapshot.store(account.id, account.timezone)
+    advance_watermark(account, "last_deal_end_date", snapshot.history_deals, "time")
+    advance_watermark(account, "last_order_end_date", snapshot.history_orders, "time_setup")
+
+    checkpoint = min(date_to, int(time.time()) - SERVER_TIME_MARGIN)
+    _advance(account, "history_backfilled_until", datetime.fromtimestamp(checkpoint, timezone.utc))
+    return results["history_deals"]["inserted"]
+
+
+def sync_history_window(account, date_from: int, date_to: int) -> int:
+    """Fetch and upsert the deals and orders of one window, then checkpoint it.
+
+    Returns:
+        int: Number of deals that were not stored yet
+    """
+    history_deals = account.history_deals_get(date_from=date_from, date_to=date_to, group='', ticket='', position='')
+    history_orders = account.history_orders_get(date_from=date_from, date_to=date_to, group='', ticket='',
+                                                position='')
+    snapshot = AccountSnapshot(history_deals=[deal._asdict() for deal in history_deals],
+                               history_orders=[order._asdict() for order in history_orders],
+                               date_from=date_from, date_to=date_to)
+    del history_deals, history_orders
+    return store_history(account, date_from, date_to, snapshot)
+
+
+def backfill_history(account, window: int = None):
+    """Fetch the account history window by window, resuming after the last checkpointed window.
+
+    Args:
+        account (Account): The account, inside an MT5 session
+        window (int): Window length in seconds, MT5_BACKFILL_WINDOW_DAYS by default
+
+    Returns:
+        int: Number of deals that were not stored yet
+    """
+    new_deals = 0
+    for date_from, date_to in history_windows(account, window):
+        new_deals += sync_history_window(account, date_from, date_to)
+    return new_deals
+
+
+def sync_account(account):
+    """Pull account info, history, open positions and pending orders of an AUTO account from MT5.
+
+    The windows of a backfill are fetched first, the latest window comes with the rest of the account data in a
+    single snapshot.
+
+    Args:
+        account (Account): The account to synchronise
+
+    Returns:
+        bool: Whether the account is active, it has new deals, open positions or pending orders
+    """
+    with account.mt5_session():
+        windows = list(history_windows(account))
+        new_deals = 0
+        for date_from, date_to in windows[:-1]:
+            new_deals += sync_history_window(account, date_from, date_to)
+
+        date_from, date_to = windows[-1]
+        snapshot = account.snapshot(date_from, date_to)
+        new_deals += store_history(account, date_from, date_to, snapshot)
+
+        # Only the flag, a full save would write back watermarks advanced concurrently
+        account.has_be_configured = True
+        account.save(update_fields=["has_be_configured"])
+
+    return bool(new_deals or snapshot.is_active)
@@ -1,89 +1,107 @@
-from pymongo import UpdateOne
+import asyncio
 from celery import shared_task
 from .models import Account
-from apps.journals.models import HistoryOrders, HistoryDeals, Orders, Positions
 from realjournals.celery import app
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
+from django_pglocks import advisory_lock
+from contextlib import ExitStack
+from logging import getLogger
+from .pool import get_session_pool
+from .breaker import CircuitOpen
+from .exceptions import LoginError, TerminalTimeout
+from . import aio, scheduler, sync, terminals
+
+logger = getLogger(__name__)
+
 
 @app.task
 def import_data_periodically():
-    accounts = Account.objects.filter(account_type='AUTO', has_be_configured=True)
-
-    for queryset in accounts:
-        try:
-            queryset.account_info()
-
-            if queryset.last_deal_end_date:
-                date_from = queryset.last_deal_end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            else:
-                date_from = queryset.start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-            date_to = _date_to = queryset.end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-            date_format = "%Y-%m-%dT%H:%M:%SZ"
-            date_from = int(datetime.strptime(date_from, date_format).timestamp())
-            date_to = int(datetime.strptime(date_to, date_format).timestamp())
-
-            history_deals = queryset.history_deals_get(date_from=date_from, date_to=date_to, group='', ticket='', position='')
-
-            data_to_insert = []
-            for history_deal in history_deals: 
-                queryset.last_deal_end_date = _date_to
-                result = HistoryDeals.objects(account=queryset.id, ticket=history_deal.ticket).first()
-                if result:
-                    result.update(**history_deal._asdict())
-                else:
-                    data_to_insert.append(HistoryDeals(account=queryset.id, **history_deal._asdict()))
-
-            if len(data_to_insert) > 0:
-                HistoryDeals.objects.insert(data_to_insert)
-            
-            if queryset.last_order_end_date:
-                date_from = queryset.last_order_end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            else:
-                date_from = queryset.start_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-
-            date_to = _date_to = queryset.end_date.strftime("%Y-%m-%dT%H:%M:%SZ")
-            date_from = int(datetime.strptime(date_from, date_format).timestamp())
-            date_to = int(datetime.strptime(date_to, date_format).timestamp())
-
-            data_to_insert = []
-            history_orders = queryset.history_orders_get(date_from=date_from, date_to=date_to, group='', ticket='', position='')
-            for history_order in history_orders:           
-                queryset.last_order_end_date = _date_to
-                result = HistoryOrders.objects(account=queryset.id, ticket=history_order.ticket).first()
-                if result:
-                    result.update(**history_order._asdict())
-                else:
-                    data_to_insert.append(HistoryOrders(account=queryset.id, **history_order._asdict()))
-
-            if len(data_to_insert) > 0:
-                HistoryOrders.objects.insert(data_to_insert)
-
-            data_to_insert = []
-            positions = queryset.positions_get(group='', ticket='', symbol='')
-            Positions.objects(account=queryset.id).delete()
-            for position in positions:       
-                data_to_insert.append(Positions(account=queryset.id, **position._asdict()))
-
-            if len(data_to_insert) > 0:
-                Positions.objects.insert(data_to_insert)
-
-            data_to_insert = []
-            orders = queryset.orders_get(group='', ticket='', symbol='')
-            Orders.objects(account=queryset.id).delete()
-            for order in orders:           
-                data_to_insert.append(Orders(account=queryset.id, **order._asdict()))
-
-            if len(data_to_insert) > 0:
-                Orders.objects.insert(data_to_insert)
-
-            queryset.has_be_configured = True
-            queryset.save()
-        except ValueError as e:
-            print(e)
-            queryset.last_deal_end_date = timezone.now() - timedelta(days=365*10)
-            queryset.last_order_end_date = timezone.now() - timedelta(days=365*10)
-            queryset.has_be_configured = False
-            queryset.save()
+    """Enqueue sync_accounts tasks of MT5_SYNC_BATCH_SIZE configured AUTO accounts due for a sync."""
+    account_ids = list(scheduler.due(Account.objects.filter(account_type='AUTO', has_be_configured=True)))
+
+    for start in range(0, len(account_ids), settings.MT5_SYNC_BATCH_SIZE):
+        sync_accounts.delay(account_ids[start:start + settings.MT5_SYNC_BATCH_SIZE])
+
+
+def account_lock(account_id):
+    """Advisory lock of the account syncs, an account is never synced twice at once."""
+    return advisory_lock("mt5-sync-account-{}".format(account_id), wait=False)
+
+
+def terminal_slot(account):
+    """Advisory lock of the sync slot of the account terminal, one sync per terminal across worker processes."""
+    return advisory_lock("mt5-sync-terminal-{0}:{1}".format(*terminals.terminal_for(account)), wait=False)
+
+
+@app.task(bind=True, max_retries=settings.MT5_SYNC_MAX_RETRIES)
+def sync_account(self, account_id):
+    with ExitStack() as stack:
+        # An account is never synced twice at once, a running sync makes this one a no-op
+        if not stack.enter_context(account_lock(account_id)):
+            logger.info("Account %s is already being synced, skipping", account_id)
+            return
+
+        account = Account.objects.filter(id=account_id, account_type='AUTO', has_be_configured=True).first()
+        if account is None:
+            return
+
+        if not stack.enter_context(terminal_slot(account)):
+            if self.request.retries >= self.max_retries:
+                # Left due, import_data_periodically enqueues it again once its dispatch lease expires
+                logger.warning("Terminal of account %s is still busy, dropping its sync", account_id)
+                return
+            raise self.retry(countdown=settings.MT5_SYNC_RETRY_DELAY)
+
+        _sync(account)
+
+    logger.info("MT5 session pool stats: %s", get_session_pool().stats())
+
+
+def _sync(account):
+    try:
+        active = sync.sync_account(account)
+        scheduler.schedule_next(account, active)
+    except (CircuitOpen, LoginError) as e:
+        # Fail fast while the terminal or trade server is down, back off like an idle account
+        logger.warning("Sync of account %s skipped: %s", account.id, e)
+        scheduler.schedule_next(account, False)
+    except ValueError as e:
+        logger.error("Sync of account %s failed: %s", account.id, e)
+        account.has_be_configured = False
+        account.save(update_fields=["has_be_configured"])
+
+
+def _sync_unless_running(account):
+    with ExitStack() as stack:
+        if not stack.enter_context(account_lock(account.id)):
+            logger.info("Account %s is already being synced, skipping", account.id)
+            return
+        if not stack.enter_context(terminal_slot(account)):
+            # Left due, import_data_periodically enqueues it again once its dispatch lease expires
+            logger.info("Terminal of account %s is busy in another worker, skipping", account.id)
+            return
+        _sync(account)
+
+
+async def _sync_concurrently(accounts):
+    client = aio.get_client()
+    results = await asyncio.gather(*(client.run(account, _sync_unless_running, account,
+                                                timeout=settings.MT5_SYNC_TIMEOUT) for account in accounts),
+                                   return_exceptions=True)
+    for account, result in zip(accounts, results):
+        if isinstance(result, TerminalTimeout):
+            # Still running on its thread, it schedules its next sync once done
+            logger.warning("Sync of account %s is slow: %s", account.id, result)
+        elif isinstance(result, Exception):
+            logger.error("Sync of account %s failed: %r", account.id, result)
+
+
+@app.task
+def sync_accounts(account_ids):
+    """Sync a batch of accounts on one event loop, concurrently across terminals and one at a time per terminal."""
+    accounts = list(Account.objects.filter(id__in=account_ids, account_type='AUTO', has_be_configured=True))
+    asyncio.run(_sync_concurrently(accounts))
+
+    logger.info("MT5 session pool stats: %s", get_session_pool().stats())
@@ -0,0 +1,102 @@
+"""Assignment of accounts to the MetaTrader 5 terminals of MT5_TERMINALS.
+
+A terminal is logged into one account at a time, so every account is pinned to one terminal by consistent
+hashing of its id: an account keeps its terminal, and the session logged into it, from one sync to the next.
+Adding or removing a terminal only moves the accounts of the ring arcs it takes or leaves, about ``1 / N`` of
+them, instead of reshuffling every account like ``id % N`` would.
+"""
+
+import hashlib
+from bisect import bisect
+from logging import getLogger
+
+from django.conf import settings
+
+from . import breaker
+
+logger = getLogger(__name__)
+
+
+def parse_terminal(value: str) -> tuple:
+    """``host:port`` as a ``(host, port)`` tuple, the port defaults to MT5_PORT."""
+    host, _, port = value.strip().rpartition(":")
+    if not host:
+        return value.strip(), int(settings.MT5_PORT)
+    return host, int(port)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring of terminals.
+
+    Args:
+        terminals (list[tuple]): ``(host, port)`` of the terminals
+
+    Keyword Args:
+        replicas (int): Points of each terminal on the ring, more points spread the accounts more evenly.
+    """
+
+    def __init__(self, terminals: list, replicas: int = 100):
+        self.terminals = list(dict.fromkeys(terminals))
+        self.replicas = replicas
+        points = sorted((_hash("{}:{}#{}".format(host, port, replica)), (host, port))
+                        for host, port in self.terminals for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._terminals = [terminal for _, terminal in points]
+
+    def __repr__(self):
+        return "<HashRing {}>".format(", ".join("{}:{}".format(*terminal) for terminal in self.terminals))
+
+    def candidates(self, key):
+        """Distinct terminals in ring order from the point of ``key``, its own terminal first."""
+        if not self._hashes:
+            return
+        start = bisect(self._hashes, _hash(str(key)))
+        seen = set()
+        for index in range(len(self._hashes)):
+            terminal = self._terminals[(start + index) % len(self._hashes)]
+            if terminal not in seen:
+                seen.add(terminal)
+                yield terminal
+                if len(seen) == len(self.terminals):
+                    return
+
+    def get(self, key) -> tuple:
+        """The terminal of ``key``."""
+        return next(self.candidates(key))
+
+
+def configured_terminals() -> list:
+    """The terminals of MT5_TERMINALS, or the single MT5_HOST:MT5_PORT terminal when it is empty."""
+    terminals = [parse_terminal(value) for value in settings.MT5_TERMINALS.split(",") if value.strip()]
+    return terminals or [(settings.MT5_HOST, int(settings.MT5_PORT))]
+
+
+_ring = None
+
+
+def get_ring() -> HashRing:
+    """The ring of the configured terminals, rebuilt when the settings change."""
+    global _ring
+    terminals = configured_terminals()
+    if _ring is None or _ring.terminals != terminals or _ring.replicas != settings.MT5_HASH_REPLICAS:
+        _ring = HashRing(terminals, settings.MT5_HASH_REPLICAS)
+    return _ring
+
+
+def terminal_for(account) -> tuple:
+    """The terminal an account is logged into.
+
+    While the breaker of its own terminal is open the account fails over to the next terminal of the ring, and
+    comes back once the breaker closes.
+    """
+    candidates = list(get_ring().candidates(account.id))
+    for terminal in candidates:
+        if breaker.terminal_breaker(*terminal).state()["status"] != breaker.OPEN:
+            if terminal != candidates[0]:
+                logger.info("Account %s fails over from %s:%s to %s:%s", account.id, *candidates[0], *terminal)
+            return terminal
+    return candidates[0]
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas_ta as ta
+from pandas import DataFrame
+
+from apps.accounts.indicators import ATR, EMA, RSI, SMA, IndicatorEngine
+from apps.utils.benchmarks import rates
+
+
+def make_columns(count, flat=False):
+    bars = rates(count, flat)
+    return {name: bars[name] for name in bars.dtype.names}
+
+
+def make_engine():
+    return IndicatorEngine(SMA(20), EMA(10), RSI(14), ATR(14))
+
+
+def expected(columns):
+    data = DataFrame(columns)
+    return {
+        "SMA_20": ta.sma(data["close"], length=20),
+        "EMA_10": ta.ema(data["close"], length=10),
+        "RSI_14": ta.rsi(data["close"], length=14),
+        "ATRr_14": ta.atr(data["high"], data["low"], data["close"], length=14),
+    }
+
+
+def assert_parity(values, columns):
+    for name, series in expected(columns).items():
+        # pandas_ta adds an epsilon to the high - low ranges when one is 0
+        np.testing.assert_allclose(values[name], series.to_numpy(dtype=np.float64), rtol=1e-9, atol=1e-12,
+                                   err_msg=name)
+
+
+def test_recompute_matches_pandas_ta():
+    columns = make_columns(2000)
+    assert_parity(make_engine().refresh(columns), columns)
+
+
+def test_appended_bars_match_pandas_ta():
+    columns = make_columns(600)
+    engine = make_engine()
+    engine.refresh({name: column[:100] for name, column in columns.items()})
+    for count in range(101, 601):
+        bars = {name: column[:count] for name, column in columns.items()}
+        # The open bar polled before it closes
+        engine.refresh(dict(bars, close=np.concatenate((bars["close"][:-1], bars["open"][-1:]))))
+        engine.refresh(bars)
+
+    assert engine.recomputes == 1
+    assert_parity(engine.values(), columns)
+
+
+def test_unchanged_closes_give_nan_rsi():
+    columns = make_columns(40, flat=True)
+    engine = make_engine()
+    values = engine.refresh({name: column[:20] for name, column in columns.items()})
+    assert np.isnan(values["RSI_14"]).all()
+
+    values = engine.refresh(columns)
+    assert engine.recomputes == 1
+    assert np.isnan(values["RSI_14"]).all()
+    assert_parity(values, columns)
+
+
+def test_history_edit_recomputes():
+    columns = make_columns(300)
+    engine = make_engine()
+    engine.refresh(columns)
+
+    edited = dict(columns, close=columns["close"].copy())
+    edited["close"][-2] += 0.001
+    values = engine.refresh(edited)
+    assert engine.recomputes == 2
+    np.testing.assert_allclose(values["EMA_10"], make_engine().refresh(edited)["EMA_10"], rtol=1e-12)
+
+    engine.refresh({name: column[1:] for name, column in columns.items()})
+    assert engine.recomputes == 3
+
+    engine.refresh({name: column[:-10] for name, column in columns.items()})
+    assert engine.recomputes == 4
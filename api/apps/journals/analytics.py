@@ -0,0 +1,162 @@
+"""Performance analytics over the closed round-trip trades of an account.
+
+The trades are loaded once as NumPy arrays, ordered by exit time, and every metric is computed with vectorized
+operations over them: no per trade Python loop runs after the load.
+"""
+
+import numpy as np
+
+from .models import Trades
+
+SECONDS_PER_DAY = 86400
+TRADING_DAYS_PER_YEAR = 252
+
+
+def load_closed_trades(account_id: int, date_from: int = None, date_to: int = None):
+    """Exit times and net profits of the closed trades of an account, ordered by exit time.
+
+    Args:
+        account_id: The account id
+        date_from: Optional range start on the exit time, as a unix timestamp
+        date_to: Optional range end on the exit time, as a unix timestamp
+
+    Returns:
+        tuple: ``(exit_times, net_profits)`` int64 and float64 arrays
+    """
+    query = {"account": account_id, "closed": True}
+    if date_from is not None or date_to is not None:
+        query["exit_time"] = {}
+        if date_from is not None:
+            query["exit_time"]["$gte"] = date_from
+        if date_to is not None:
+            query["exit_time"]["$lte"] = date_to
+
+    # One document per exit day holding that day's columns, instead of one decoded document per trade
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"exit_time": 1}},
+        {"$group": {
+            "_id": {"$floor": {"$divide": ["$exit_time", SECONDS_PER_DAY]}},
+            "exit_times": {"$push": "$exit_time"},
+            "net_profits": {"$push": {"$ifNull": ["$net_profit", 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+    exit_times, net_profits = [], []
+    for day in Trades._get_collection().aggregate(pipeline, allowDiskUse=True):
+        exit_times.extend(day["exit_times"])
+        net_profits.extend(day["net_profits"])
+    return np.array(exit_times, dtype=np.int64), np.array(net_profits, dtype=np.float64)
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    """Length of the longest run of True values."""
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def _current_run(mask: np.ndarray) -> int:
+    """Length of the run of True values the array ends with."""
+    breaks = np.flatnonzero(~mask)
+    return int(mask.size - breaks[-1] - 1) if breaks.size else int(mask.size)
+
+
+def _ratio(numerator: float, denominator: float):
+    return float(numerator / denominator) if denominator else None
+
+
+def compute_metrics(exit_times: np.ndarray, net_profits: np.ndarray, starting_balance: float = 0.0) -> dict:
+    """Drawdown, profit factor, expectancy, Sharpe and Sortino ratios and streaks of a trade sequence.
+
+    Winning trades are the ones with a net profit ``>= 0``, as in the stats endpoint. The Sharpe and Sortino ratios
+    are annualized from the daily (UTC) net profit.
+
+    Args:
+        exit_times: Trade exit times, ascending
+        net_profits: Net profit of each trade
+        starting_balance: Balance before the first trade, the drawdown percentage needs it
+
+    Returns:
+        dict: The metrics, ``None`` where a metric is undefined
+    """
+    count = int(net_profits.size)
+    wins = net_profits >= 0
+    losses = ~wins
+    win_count = int(wins.sum())
+    loss_count = count - win_count
+
+    gross_profit = float(net_profits[wins].sum())
+    gross_loss = float(net_profits[losses].sum())
+
+    equity = starting_balance + np.cumsum(net_profits)
+    peaks = np.maximum.accumulate(np.concatenate(([starting_balance], equity)))[1:]
+    drawdowns = peaks - equity
+    max_drawdown_index = int(drawdowns.argmax()) if count else 0
+    max_drawdown = float(drawdowns[max_drawdown_index]) if count else 0.0
+    max_drawdown_peak = float(peaks[max_drawdown_index]) if count else 0.0
+
+    days, day_index = np.unique(exit_times // SECONDS_PER_DAY, return_inverse=True)
+    daily = np.bincount(day_index, weights=net_profits, minlength=days.size) if count else np.zeros(0)
+    daily_mean = float(daily.mean()) if daily.size else 0.0
+    daily_std = float(daily.std(ddof=1)) if daily.size > 1 else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(daily, 0) ** 2))) if daily.size else 0.0
+    annualization = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    return {
+        'total_trades': count,
+        'winning_trades': win_count,
+        'losing_trades': loss_count,
+        'win_rate': _ratio(win_count, count),
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'net_profit': gross_profit + gross_loss,
+        'profit_factor': _ratio(gross_profit, abs(gross_loss)),
+        'average_win': _ratio(gross_profit, win_count),
+        'average_loss': _ratio(gross_loss, loss_count),
+        'expectancy': _ratio(gross_profit + gross_loss, count),
+        'largest_win': float(net_profits.max()) if win_count else None,
+        'largest_loss': float(net_profits.min()) if loss_count else None,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_percent': _ratio(max_drawdown * 100, max_drawdown_peak) if max_drawdown_peak > 0 else None,
+        'sharpe_ratio': _ratio(daily_mean * annualization, daily_std),
+        'sortino_ratio': _ratio(daily_mean * annualization, downside),
+        'trading_days': int(days.size),
+        'max_winning_streak': _longest_run(wins),
+        'max_losing_streak': _longest_run(losses),
+        'current_winning_streak': _current_run(wins),
+        'current_losing_streak': _current_run(losses),
+    }
+
+
+def starting_balance(account_id: int, balance: float, date_from: int = None) -> float:
+    """Balance before ``date_from``: the current balance less the net profit of the trades closed since.
+
+    Deposits, withdrawals and other balance operations in between are not accounted for.
+    """
+    match = {"account": account_id, "closed": True}
+    if date_from is not None:
+        match["exit_time"] = {"$gte": date_from}
+    pipeline = [{"$match": match}, {"$group": {"_id": None, "net_profit": {"$sum": "$net_profit"}}}]
+    result = next(Trades._get_collection().aggregate(pipeline), {})
+    return balance - result.get("net_profit", 0)
+
+
+def account_analytics(account_id: int, date_from: int = None, date_to: int = None, balance: float = None) -> dict:
+    """Compute the analytics endpoint response.
+
+    Args:
+        account_id: The account id
+        date_from: Optional range start on the trades exit time, as a unix timestamp
+        date_to: Optional range end on the trades exit time, as a unix timestamp
+        balance: The current account balance, the drawdown percentage is relative to the equity it implies
+
+    Returns:
+        dict: The metrics of compute_metrics
+    """
+    exit_times, net_profits = load_closed_trades(account_id, date_from, date_to)
+    balance = starting_balance(account_id, balance, date_from) if balance else 0.0
+    return compute_metrics(exit_times, net_profits, balance)
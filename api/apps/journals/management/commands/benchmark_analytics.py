@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.journals.analytics import compute_metrics, load_closed_trades
+from apps.journals.models import Trades
+from apps.utils.benchmarks import insert, timed, trades
+
+
+class Command(BaseCommand):
+    help = "Time the trade analytics on generated trades and fail when they exceed the time budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trades', type=int, dest='trades', default=1000000,
+                            help='Number of closed trades to generate')
+        parser.add_argument('--repeat', type=int, dest='repeat', default=3,
+                            help='Number of timed runs')
+        parser.add_argument('--budget', type=float, dest='budget', default=1.0,
+                            help='Maximum seconds allowed to load and compute the analytics')
+        parser.add_argument('--account_id', type=int, dest='account_id', default=-1,
+                            help='Scratch account id the generated trades are stored under')
+
+    def handle(self, *args, **options):
+        account_id = options["account_id"]
+
+        Trades.objects(account=account_id).delete()
+        insert(Trades, trades(account_id, options["trades"]))
+        try:
+            load, (exit_times, net_profits) = timed(lambda: load_closed_trades(account_id), options["repeat"])
+            compute, metrics = timed(lambda: compute_metrics(exit_times, net_profits), options["repeat"])
+        finally:
+            Trades.objects(account=account_id).delete()
+
+        self.stdout.write("trades: {}".format(metrics["total_trades"]))
+        self.stdout.write("load: {:.3f}s".format(load))
+        self.stdout.write("compute: {:.3f}s".format(compute))
+        if load + compute > options["budget"]:
+            raise CommandError("Analytics took {:.3f}s, over the {:.3f}s budget".format(load + compute,
+                                                                                      options["budget"]))
+        self.stdout.write(self.style.SUCCESS("total: {:.3f}s, within the {:.3f}s budget".format(load + compute,
+                                                                                               options["budget"])))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.serializers import HistoryDealsSerializer
+from apps.journals.models import HistoryDeals
+from apps.utils.benchmarks import deals, insert, timed
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of the history deals serializer over mongoengine documents and raw pymongo dicts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deals', type=int, dest='deals', default=100000,
+                            help='Number of deals to generate')
+        parser.add_argument('--page_size', type=int, dest='page_size', default=100,
+                            help='Number of rows serialized per page, as the list endpoints do')
+        parser.add_argument('--repeat', type=int, dest='repeat', default=3,
+                            help='Number of timed runs of each implementation')
+        parser.add_argument('--account_id', type=int, dest='account_id', default=-1,
+                            help='Scratch account id the generated deals are stored under')
+
+    def _serialize(self, queryset, page_size):
+        rows = 0
+        page = []
+        for item in queryset:
+            page.append(item)
+            if len(page) == page_size:
+                rows += len(HistoryDealsSerializer(page, many=True).data)
+                page = []
+        return rows + len(HistoryDealsSerializer(page, many=True).data)
+
+    def handle(self, *args, **options):
+        account_id = options["account_id"]
+        page_size = options["page_size"]
+
+        HistoryDeals.objects(account=account_id).delete()
+        insert(HistoryDeals, deals(account_id, options["deals"], int(time.time())))
+        try:
+            queryset = HistoryDeals.objects(account=account_id).order_by('-time')
+            raw = queryset.only(*HistoryDealsSerializer.projection).as_pymongo()
+            documents, _ = timed(lambda: self._serialize(queryset, page_size), options["repeat"])
+            dicts, _ = timed(lambda: self._serialize(raw, page_size), options["repeat"])
+        finally:
+            HistoryDeals.objects(account=account_id).delete()
+
+        rows = options["deals"]
+        self.stdout.write("rows: {}".format(rows))
+        self.stdout.write("documents: {:.3f}s, {:.0f} rows/sec".format(documents, rows / documents if documents else 0))
+        self.stdout.write("raw dicts: {:.3f}s, {:.0f} rows/sec".format(dicts, rows / dicts if dicts else 0))
+        self.stdout.write(self.style.SUCCESS("speedup: {:.1f}x".format(documents / dicts if dicts else float("inf"))))
@@ -0,0 +1,71 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.journals import rollups
+from apps.journals.models import HistoryDeals, Positions, DailyAccountStats
+from apps.journals.stats import account_stats
+from apps.utils.benchmarks import deals, insert, timed
+
+
+def legacy_account_stats(account_id, date_from, date_to):
+    """The stats endpoint as it was before the $facet aggregation, kept as the benchmark baseline."""
+    deals = HistoryDeals.objects(account=account_id, time__gte=date_from, time__lte=date_to).order_by('-time')
+    positions = Positions.objects(account=account_id)
+
+    aggregated_data = deals.aggregate([{"$group": {
+        "_id": "$symbol",
+        "trade_allocation_amounts": {"$sum": {"$multiply": ["$volume", "$price"]}}
+    }}])
+    trade_allocation = [(data['_id'], data['trade_allocation_amounts']) for data in aggregated_data if data['_id']]
+
+    daily_cumulative_pl = defaultdict(float)
+    for deal in deals.filter(entry=1):
+        daily_cumulative_pl[datetime.utcfromtimestamp(deal.time).date()] += deal.profit
+
+    return {
+        'total_trades': deals.filter(entry=1).count() + positions.filter().count(),
+        'total_winning_trades': deals.filter(entry=1, profit__gte=0).count() + positions.filter(profit__gte=0).count(),
+        'total_lossing_trades': deals.filter(entry=1, profit__lt=0).count() + positions.filter(profit__lt=0).count(),
+        'net_profit': sum(deal.profit for deal in deals.filter(entry=1, profit__gte=0)) + sum(position.profit for position in positions.filter(profit__gte=0)),
+        'net_loss': sum(deal.profit for deal in deals.filter(entry=1, profit__lt=0)) + sum(position.profit for position in positions.filter(profit__lt=0)),
+        'net_profit_loss_data': list(daily_cumulative_pl.values()),
+        'trade_allocation': trade_allocation,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare the stats endpoint rollup reads against the legacy per-metric queries on generated deals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--deals', type=int, dest='deals', default=100000,
+                            help='Number of deals to generate')
+        parser.add_argument('--repeat', type=int, dest='repeat', default=3,
+                            help='Number of timed runs of each implementation')
+        parser.add_argument('--account_id', type=int, dest='account_id', default=-1,
+                            help='Scratch account id the generated deals are stored under')
+
+    def handle(self, *args, **options):
+        account_id = options["account_id"]
+        date_to = int(time.time())
+        date_from = date_to - 366 * 86400
+
+        HistoryDeals.objects(account=account_id).delete()
+        insert(HistoryDeals, deals(account_id, options["deals"], date_to))
+        try:
+            started = time.perf_counter()
+            rollups.rebuild(account_id)
+            rebuild = time.perf_counter() - started
+            legacy, _ = timed(lambda: legacy_account_stats(account_id, date_from, date_to), options["repeat"])
+            rollup, _ = timed(lambda: account_stats(account_id, date_from, date_to), options["repeat"])
+        finally:
+            HistoryDeals.objects(account=account_id).delete()
+            DailyAccountStats.objects(account=account_id).delete()
+
+        self.stdout.write("deals: {}".format(options["deals"]))
+        self.stdout.write("rollup rebuild: {:.3f}s".format(rebuild))
+        self.stdout.write("legacy queries: {:.3f}s".format(legacy))
+        self.stdout.write("rollup reads: {:.3f}s".format(rollup))
+        self.stdout.write(self.style.SUCCESS("speedup: {:.1f}x".format(legacy / rollup if rollup else float("inf"))))
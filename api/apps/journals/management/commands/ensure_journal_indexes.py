@@ -0,0 +1,116 @@
+from django.core.management.base import BaseCommand, CommandError
+from pymongo.errors import OperationFailure
+
+from apps.journals.models import HistoryDeals, HistoryOrders, Orders, Positions, DailyAccountStats, Trades
+
+JOURNAL_DOCUMENTS = (HistoryDeals, HistoryOrders, Orders, Positions, DailyAccountStats, Trades)
+
+
+class Command(BaseCommand):
+    help = "Create or verify the indexes of the journals collections and report their usage"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check',
+                            action='store_true',
+                            dest='check',
+                            default=False,
+                            help='Only verify the indexes and report the duplicated documents of the unique ones, '
+                                 'fail if any is missing or duplicated')
+        parser.add_argument('--dedupe',
+                            action='store_true',
+                            dest='dedupe',
+                            default=False,
+                            help='Delete the duplicated documents of the unique indexes first, keeping the last '
+                                 'written one')
+        parser.add_argument('--drop-extra',
+                            action='store_true',
+                            dest='drop_extra',
+                            default=False,
+                            help='Drop the indexes of the collections no longer declared, like the ones replaced')
+
+    def _duplicates(self, document):
+        """Yield the fields of every unique index of ``document`` with the ids of the documents sharing a key."""
+        collection = document._get_collection()
+        for spec in document._meta["index_specs"]:
+            if not spec.get("unique"):
+                continue
+            fields = [field for field, _ in spec["fields"]]
+            pipeline = [
+                {"$group": {"_id": {field: "$" + field for field in fields}, "ids": {"$push": "$_id"},
+                            "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+            ]
+            for group in collection.aggregate(pipeline, allowDiskUse=True):
+                yield fields, group["ids"]
+
+    def _dedupe(self, document):
+        """Delete all but the last written document of every unique index key held by several documents."""
+        collection = document._get_collection()
+        deleted = {}
+        for fields, ids in self._duplicates(document):
+            # ObjectIds grow with their insertion time
+            count = collection.delete_many({"_id": {"$in": sorted(ids)[:-1]}}).deleted_count
+            deleted[tuple(fields)] = deleted.get(tuple(fields), 0) + count
+        for fields, count in deleted.items():
+            self.stdout.write(self.style.WARNING("{}: deleted {} documents duplicating {}".format(
+                document._get_collection_name(), count, list(fields))))
+
+    def _report_duplicates(self, document) -> bool:
+        """Report the documents the ``--dedupe`` option would delete, return whether there are any."""
+        duplicated = {}
+        for fields, ids in self._duplicates(document):
+            duplicated[tuple(fields)] = duplicated.get(tuple(fields), 0) + len(ids) - 1
+        for fields, count in duplicated.items():
+            self.stdout.write(self.style.ERROR("{}: {} documents duplicating {}".format(
+                document._get_collection_name(), count, list(fields))))
+        return bool(duplicated)
+
+    def _drop_extra(self, document, extra):
+        """Drop the indexes of the collection no longer declared by ``document``, like the ones replaced."""
+        collection = document._get_collection()
+        for name, info in collection.index_information().items():
+            if name != "_id_" and info["key"] in extra:
+                collection.drop_index(name)
+                self.stdout.write("{}: dropped index {}".format(document._get_collection_name(), name))
+
+    def handle(self, *args, **options):
+        missing_indexes = False
+        duplicated_documents = False
+
+        for document in JOURNAL_DOCUMENTS:
+            name = document._get_collection_name()
+
+            if options["check"]:
+                duplicated_documents |= self._report_duplicates(document)
+            else:
+                if options["dedupe"]:
+                    self._dedupe(document)
+                try:
+                    document.ensure_indexes()
+                except OperationFailure as e:
+                    raise CommandError("Could not create the indexes of {}, run with --check to list the duplicated "
+                                       "documents and with --dedupe to delete them: {}".format(name, e))
+
+            comparison = document.compare_indexes()
+            if comparison["extra"]:
+                if options["drop_extra"] and not options["check"]:
+                    self._drop_extra(document, comparison["extra"])
+                else:
+                    self.stdout.write(self.style.WARNING("{}: indexes no longer declared {}, run with --drop-extra "
+                                                         "to drop them".format(name, comparison["extra"])))
+
+            if comparison["missing"]:
+                missing_indexes = True
+                self.stdout.write(self.style.ERROR("{}: missing indexes {}".format(name, comparison["missing"])))
+            else:
+                self.stdout.write(self.style.SUCCESS("{}: indexes ok".format(name)))
+
+            for stats in document._get_collection().aggregate([{"$indexStats": {}}]):
+                self.stdout.write("    {name}: {ops} ops since {since}".format(name=stats["name"],
+                                                                             ops=stats["accesses"]["ops"],
+                                                                             since=stats["accesses"]["since"]))
+
+        if missing_indexes:
+            raise CommandError("Some journal indexes are missing, run ensure_journal_indexes without --check")
+        if duplicated_documents:
+            raise CommandError("Some journal documents are duplicated, run ensure_journal_indexes with --dedupe")
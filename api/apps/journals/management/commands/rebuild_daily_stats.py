@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.journals import rollups
+
+
+class Command(BaseCommand):
+    help = "Regenerate the DailyAccountStats rollups from the raw deals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account_id',
+                            type=int,
+                            dest='account_id',
+                            default=None,
+                            help='Provide Account ID')
+
+    def handle(self, *args, **options):
+        Account = apps.get_model("accounts", "Account")
+
+        accounts = Account.objects.all()
+        if options["account_id"] is not None:
+            accounts = accounts.filter(id=options["account_id"])
+
+        for account_id, tz in accounts.values_list("id", "timezone"):
+            rollups.rebuild(account_id, tz)
+            self.stdout.write("Rebuilt daily stats of account {}".format(account_id))
@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.journals import trades
+
+
+class Command(BaseCommand):
+    help = "Regenerate the round-trip Trades from the raw deals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--account_id',
+                            type=int,
+                            dest='account_id',
+                            default=None,
+                            help='Provide Account ID')
+
+    def handle(self, *args, **options):
+        Account = apps.get_model("accounts", "Account")
+
+        accounts = Account.objects.all()
+        if options["account_id"] is not None:
+            accounts = accounts.filter(id=options["account_id"])
+
+        for account_id in accounts.values_list("id", flat=True):
+            trades.rebuild(account_id)
+            self.stdout.write("Rebuilt trades of account {}".format(account_id))
@@ -1,4 +1,4 @@
-from mongoengine import Document, IntField, FloatField, StringField, BooleanField
+from mongoengine import Document, IntField, FloatField, StringField, BooleanField, DateTimeField
 
 class HistoryDeals(Document):
     account = IntField()
@@ -23,6 +23,15 @@ class HistoryDeals(Document):
     comment = StringField()
     external_id = StringField()
 
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "ticket"], "unique": True},
+            ["account", "-time", "-ticket"],
+            ["account", "entry", "-time"],
+        ],
+    }
+
 class Orders(Document):
     account = IntField()
     ticket = IntField()
@@ -50,6 +59,14 @@ class Orders(Document):
     comment = StringField()
     external_id = StringField()
 
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "ticket"], "unique": True},
+            ["account", "-time_setup", "-ticket"],
+        ],
+    }
+
 class HistoryOrders(Document):
     account = IntField()
     ticket = IntField()
@@ -77,6 +94,14 @@ class HistoryOrders(Document):
     comment = StringField()
     external_id = StringField()
 
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "ticket"], "unique": True},
+            ["account", "-time_setup", "-ticket"],
+        ],
+    }
+
 class Positions(Document):
     account = IntField()
     ticket = IntField()
@@ -98,3 +123,62 @@ class Positions(Document):
     symbol = StringField()
     comment = StringField()
     external_id = StringField()
+
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "ticket"], "unique": True},
+            ["account", "-time", "-ticket"],
+        ],
+    }
+
+class DailyAccountStats(Document):
+    account = IntField()
+    day = StringField()
+    symbol = StringField()
+    deals = IntField(default=0)
+    volume = FloatField(default=0)
+    allocation = FloatField(default=0)
+    net_profit = FloatField(default=0)
+    profit = FloatField(default=0)
+    loss = FloatField(default=0)
+    winning_trades = IntField(default=0)
+    losing_trades = IntField(default=0)
+    refreshed_at = DateTimeField()
+
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "day", "symbol"], "unique": True},
+        ],
+    }
+
+class Trades(Document):
+    account = IntField()
+    position_id = IntField()
+    symbol = StringField()
+    type = IntField()
+    closed = BooleanField(default=False)
+    entry_time = IntField()
+    exit_time = IntField()
+    duration = IntField()
+    volume = FloatField(default=0)
+    closed_volume = FloatField(default=0)
+    entry_price = FloatField()
+    exit_price = FloatField()
+    commission = FloatField(default=0)
+    swap = FloatField(default=0)
+    fee = FloatField(default=0)
+    profit = FloatField(default=0)
+    net_profit = FloatField(default=0)
+    deals = IntField(default=0)
+    refreshed_at = DateTimeField()
+
+    meta = {
+        "auto_create_index": False,
+        "indexes": [
+            {"fields": ["account", "position_id"], "unique": True},
+            ["account", "closed", "-exit_time"],
+            ["account", "symbol", "-exit_time"],
+        ],
+    }
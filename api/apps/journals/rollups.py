@@ -0,0 +1,98 @@
+"""Daily per symbol rollups of the account deals.
+
+``DailyAccountStats`` holds one document per account, day (in the account timezone) and symbol. The MT5 sync and
+``create_trades`` refresh only the days touched by the deals they wrote, so dashboard reads are O(days) instead of
+O(deals).
+"""
+
+from datetime import datetime
+from typing import Iterable
+
+import pytz
+from django.utils import timezone
+from pymongo import DeleteMany, UpdateOne
+
+from apps.accounts.mt5 import DealEntry
+
+from .models import HistoryDeals, DailyAccountStats
+
+EPOCH = datetime(1970, 1, 1)
+# Largest UTC offset, deals this far around the touched days can still fall inside them
+MAX_UTC_OFFSET = 14 * 60 * 60
+
+
+def to_day(t: int, tz: str = "UTC") -> str:
+    """The day a unix timestamp falls in, as bucketed by day_expression."""
+    return datetime.fromtimestamp(t, pytz.timezone(tz)).strftime("%Y-%m-%d")
+
+
+def day_expression(tz: str) -> dict:
+    return {"$dateToString": {"format": "%Y-%m-%d",
+                              "date": {"$add": [EPOCH, {"$multiply": ["$time", 1000]}]},
+                              "timezone": tz}}
+
+
+def rollup_pipeline(match: dict, tz: str, days: list = None) -> list:
+    profit = {"$ifNull": ["$profit", 0]}
+    is_exit = {"$eq": ["$entry", int(DealEntry.OUT)]}
+    is_winning = {"$and": [is_exit, {"$gte": [profit, 0]}]}
+    is_losing = {"$and": [is_exit, {"$lt": [profit, 0]}]}
+
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"day": day_expression(tz)}},
+    ]
+    if days is not None:
+        pipeline.append({"$match": {"day": {"$in": days}}})
+    pipeline.append({"$group": {
+        "_id": {"day": "$day", "symbol": "$symbol"},
+        "deals": {"$sum": 1},
+        "volume": {"$sum": "$volume"},
+        "allocation": {"$sum": {"$multiply": ["$volume", "$price"]}},
+        "net_profit": {"$sum": {"$cond": [is_exit, profit, 0]}},
+        "profit": {"$sum": {"$cond": [is_winning, profit, 0]}},
+        "loss": {"$sum": {"$cond": [is_losing, profit, 0]}},
+        "winning_trades": {"$sum": {"$cond": [is_winning, 1, 0]}},
+        "losing_trades": {"$sum": {"$cond": [is_losing, 1, 0]}},
+    }})
+    return pipeline
+
+
+def _write(account_id: int, match: dict, tz: str, days: list = None):
+    refreshed_at = timezone.now()
+    operations = []
+    for row in HistoryDeals._get_collection().aggregate(rollup_pipeline(match, tz, days)):
+        key = row.pop("_id")
+        key = {"account": account_id, "day": key["day"], "symbol": key.get("symbol")}
+        operations.append(UpdateOne(key, {"$set": dict(row, refreshed_at=refreshed_at)}, upsert=True))
+
+    # Rollups of the refreshed days that no longer have any deal
+    stale = {"account": account_id, "refreshed_at": {"$lt": refreshed_at}}
+    if days is not None:
+        stale["day"] = {"$in": days}
+    operations.append(DeleteMany(stale))
+
+    DailyAccountStats._get_collection().bulk_write(operations, ordered=True)
+
+
+def refresh_days(account_id: int, times: Iterable[int], tz: str = "UTC"):
+    """Recompute the rollups of the days the given deal times fall in.
+
+    Args:
+        account_id: The account id
+        times: Unix timestamps of the new or changed deals
+        tz: The account timezone
+    """
+    times = list(times)
+    if not times:
+        return
+
+    days = sorted({to_day(t, tz) for t in times})
+    match = {"account": account_id,
+             "time": {"$gte": min(times) - 86400 - MAX_UTC_OFFSET, "$lte": max(times) + 86400 + MAX_UTC_OFFSET}}
+    _write(account_id, match, tz, days)
+
+
+def rebuild(account_id: int, tz: str = "UTC"):
+    """Regenerate every rollup of an account from its raw deals."""
+    _write(account_id, {"account": account_id}, tz)
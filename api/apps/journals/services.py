@@ -0,0 +1,102 @@
+"""Write paths for the journals collections."""
+
+from typing import Iterable, Type
+
+from django.conf import settings
+from mongoengine import Document
+from pymongo import DeleteMany, InsertOne, ReplaceOne, UpdateOne
+
+from apps.utils.iterators import split_by_n
+
+from . import rollups, trades
+from .models import HistoryDeals, HistoryOrders, Orders, Positions
+
+
+def bulk_upsert(document: Type[Document], account_id: int, rows: Iterable[dict]) -> dict:
+    """Upsert rows keyed on ``(account, ticket)`` with unordered ``bulk_write`` batches.
+
+    Args:
+        document: The journal document class whose collection is written
+        account_id: The owner account id
+        rows: Documents as dicts, each one must have a ``ticket``
+
+    Returns:
+        dict: Matched, inserted and modified counts over all the batches
+    """
+    collection = document._get_collection()
+    counts = {"matched": 0, "inserted": 0, "modified": 0}
+
+    operations = []
+    for row in rows:
+        row = dict(row, account=account_id)
+        operations.append(UpdateOne({"account": account_id, "ticket": row["ticket"]}, {"$set": row}, upsert=True))
+
+    for batch in split_by_n(operations, settings.JOURNALS_BULK_BATCH_SIZE):
+        result = collection.bulk_write(batch, ordered=False)
+        counts["matched"] += result.matched_count
+        counts["inserted"] += result.upserted_count
+        counts["modified"] += result.modified_count
+
+    return counts
+
+
+def upsert_history_deals(account_id: int, deals: Iterable[dict], tz: str = "UTC") -> dict:
+    """Upsert deals, then refresh the daily rollups of the days they fall in (``tz`` is the account timezone) and the
+    round-trip trades of their positions."""
+    deals = [dict(deal) for deal in deals]
+    counts = bulk_upsert(HistoryDeals, account_id, deals)
+    rollups.refresh_days(account_id, (deal["time"] for deal in deals if deal.get("time")), tz)
+    trades.refresh_positions(account_id, (deal.get("position_id") for deal in deals))
+    return counts
+
+
+def upsert_history_orders(account_id: int, orders: Iterable[dict]) -> dict:
+    return bulk_upsert(HistoryOrders, account_id, orders)
+
+
+def replace_open(document: Type[Document], account_id: int, rows: Iterable[dict]) -> dict:
+    """Make the account documents match ``rows`` by writing only the difference, keyed on ``ticket``.
+
+    New tickets are inserted, changed ones replaced and the missing ones deleted in a single unordered
+    ``bulk_write``, so readers never see the collection empty for the account in between.
+
+    Args:
+        document: The journal document class whose collection is written
+        account_id: The owner account id
+        rows: The complete current set of documents as dicts, each one must have a ``ticket``
+
+    Returns:
+        dict: Inserted, modified and deleted counts
+    """
+    collection = document._get_collection()
+    current = {row["ticket"]: row for row in collection.find({"account": account_id}, {"_id": 0})}
+
+    operations = []
+    tickets = set()
+    for row in rows:
+        row = dict(row, account=account_id)
+        tickets.add(row["ticket"])
+        existing = current.get(row["ticket"])
+        if existing is None:
+            operations.append(InsertOne(row))
+        elif existing != row:
+            operations.append(ReplaceOne({"account": account_id, "ticket": row["ticket"]}, row))
+
+    gone = [ticket for ticket in current if ticket not in tickets]
+    if gone:
+        operations.append(DeleteMany({"account": account_id, "ticket": {"$in": gone}}))
+
+    counts = {"inserted": 0, "modified": 0, "deleted": 0}
+    if operations:
+        result = collection.bulk_write(operations, ordered=False)
+        counts = {"inserted": result.inserted_count, "modified": result.modified_count,
+                  "deleted": result.deleted_count}
+    return counts
+
+
+def replace_positions(account_id: int, positions: Iterable[dict]) -> dict:
+    return replace_open(Positions, account_id, positions)
+
+
+def replace_orders(account_id: int, orders: Iterable[dict]) -> dict:
+    return replace_open(Orders, account_id, orders)
@@ -0,0 +1,85 @@
+"""Server side aggregations backing the account stats endpoint."""
+
+from .models import DailyAccountStats, Positions
+from .rollups import to_day
+
+
+def _outcome_group(profit="$profit"):
+    profit = {"$ifNull": [profit, 0]}
+    is_winning = {"$gte": [profit, 0]}
+    return {
+        "_id": None,
+        "winning": {"$sum": {"$cond": [is_winning, 1, 0]}},
+        "losing": {"$sum": {"$cond": [is_winning, 0, 1]}},
+        "profit": {"$sum": {"$cond": [is_winning, profit, 0]}},
+        "loss": {"$sum": {"$cond": [is_winning, 0, profit]}},
+    }
+
+
+def daily_stats_pipeline(account_id: int, day_from: str, day_to: str) -> list:
+    """One $facet over the account daily rollups: exit deal outcomes, daily P/L and allocation per symbol."""
+    return [
+        {"$match": {"account": account_id, "day": {"$gte": day_from, "$lte": day_to}}},
+        {"$facet": {
+            "outcomes": [
+                {"$group": {
+                    "_id": None,
+                    "winning": {"$sum": "$winning_trades"},
+                    "losing": {"$sum": "$losing_trades"},
+                    "profit": {"$sum": "$profit"},
+                    "loss": {"$sum": "$loss"},
+                }},
+            ],
+            "daily": [
+                {"$match": {"$or": [{"winning_trades": {"$gt": 0}}, {"losing_trades": {"$gt": 0}}]}},
+                {"$group": {"_id": "$day", "profit": {"$sum": "$net_profit"}}},
+                {"$sort": {"_id": -1}},
+            ],
+            "allocation": [
+                {"$group": {"_id": "$symbol", "amount": {"$sum": "$allocation"}}},
+            ],
+        }},
+    ]
+
+
+def positions_pipeline(account_id: int) -> list:
+    return [
+        {"$match": {"account": account_id}},
+        {"$group": _outcome_group()},
+    ]
+
+
+def account_stats(account_id: int, date_from: int, date_to: int, tz: str = "UTC") -> dict:
+    """Compute the stats endpoint response from the daily rollups and one aggregation on Positions.
+
+    The range is widened to the whole days, in the account timezone, ``date_from`` and ``date_to`` fall in.
+
+    Args:
+        account_id: The account id
+        date_from: Range start as a unix timestamp
+        date_to: Range end as a unix timestamp
+        tz: The account timezone
+
+    Returns:
+        dict: The stats response
+    """
+    pipeline = daily_stats_pipeline(account_id, to_day(date_from, tz), to_day(date_to, tz))
+    deals = next(DailyAccountStats._get_collection().aggregate(pipeline))
+    positions = next(Positions._get_collection().aggregate(positions_pipeline(account_id)), {})
+    outcomes = deals["outcomes"][0] if deals["outcomes"] else {}
+    allocation = [row for row in deals["allocation"] if row["_id"]]
+
+    def total(key):
+        return outcomes.get(key, 0) + positions.get(key, 0)
+
+    return {
+        'total_trades': total("winning") + total("losing"),
+        'total_winning_trades': total("winning"),
+        'total_lossing_trades': total("losing"),
+        'net_profit': total("profit"),
+        'net_loss': total("loss"),
+        'net_profit_loss_data': [row["profit"] for row in deals["daily"]],
+        'net_profit_loss_labels': [row["_id"] for row in deals["daily"]],
+        'trade_allocation_amounts': [row["amount"] for row in allocation],
+        'trade_allocation_categories': [row["_id"] for row in allocation],
+    }
@@ -0,0 +1,105 @@
+"""Round-trip trades rebuilt from the account deals.
+
+``Trades`` holds one document per account and MT5 position: the deals sharing a ``position_id`` are folded into
+entry and exit times, volume weighted entry and exit prices, and the net profit after commission, swap and fee. The
+MT5 sync and ``create_trades`` refresh only the positions touched by the deals they wrote.
+
+Reversals (``DealEntry.INOUT``) on netting accounts are counted as exits of the position they reverse.
+"""
+
+from typing import Iterable
+
+from django.conf import settings
+from django.utils import timezone
+from pymongo import DeleteMany, UpdateOne
+
+from apps.accounts.mt5 import DealEntry, DealType
+from apps.utils.iterators import split_by_n
+
+from .models import HistoryDeals, Trades
+
+# Volumes are lot fractions, sums closer than this are equal
+VOLUME_EPSILON = 1e-8
+
+
+def trades_pipeline(match: dict) -> list:
+    volume = {"$ifNull": ["$volume", 0]}
+    value = {"$multiply": [volume, {"$ifNull": ["$price", 0]}]}
+    is_entry = {"$eq": ["$entry", int(DealEntry.IN)]}
+    is_exit = {"$in": ["$entry", [int(DealEntry.OUT), int(DealEntry.INOUT), int(DealEntry.OUT_BY)]]}
+
+    # Balance, credit and other non trading deals have no position
+    match = dict(match, type={"$in": [int(DealType.BUY), int(DealType.SELL)]})
+    match.setdefault("position_id", {"$gt": 0})
+
+    return [
+        {"$match": match},
+        {"$sort": {"time_msc": 1, "time": 1, "ticket": 1}},
+        {"$group": {
+            "_id": "$position_id",
+            "symbol": {"$first": "$symbol"},
+            "type": {"$first": "$type"},
+            "entry_time": {"$min": {"$cond": [is_entry, "$time", None]}},
+            "exit_time": {"$max": {"$cond": [is_exit, "$time", None]}},
+            "volume": {"$sum": {"$cond": [is_entry, volume, 0]}},
+            "entry_value": {"$sum": {"$cond": [is_entry, value, 0]}},
+            "closed_volume": {"$sum": {"$cond": [is_exit, volume, 0]}},
+            "exit_value": {"$sum": {"$cond": [is_exit, value, 0]}},
+            "commission": {"$sum": {"$ifNull": ["$commission", 0]}},
+            "swap": {"$sum": {"$ifNull": ["$swap", 0]}},
+            "fee": {"$sum": {"$ifNull": ["$fee", 0]}},
+            "profit": {"$sum": {"$ifNull": ["$profit", 0]}},
+            "deals": {"$sum": 1},
+        }},
+    ]
+
+
+def to_trade(row: dict) -> dict:
+    """Finish a trades_pipeline group into the fields of a Trades document."""
+    entry_value = row.pop("entry_value")
+    exit_value = row.pop("exit_value")
+    volume, closed_volume = row["volume"], row["closed_volume"]
+    closed = volume > 0 and closed_volume >= volume - VOLUME_EPSILON
+
+    return dict(
+        row,
+        closed=closed,
+        entry_price=entry_value / volume if volume else None,
+        exit_price=exit_value / closed_volume if closed_volume else None,
+        net_profit=row["profit"] + row["commission"] + row["swap"] + row["fee"],
+        duration=row["exit_time"] - row["entry_time"] if closed and row["entry_time"] is not None else None,
+    )
+
+
+def _write(account_id: int, match: dict, position_ids: list = None):
+    refreshed_at = timezone.now()
+    operations = []
+    # The deals of a whole account may not fit the in-memory $sort limit
+    for row in HistoryDeals._get_collection().aggregate(trades_pipeline(match), allowDiskUse=True):
+        key = {"account": account_id, "position_id": row.pop("_id")}
+        operations.append(UpdateOne(key, {"$set": dict(to_trade(row), refreshed_at=refreshed_at)}, upsert=True))
+
+    # Trades of the refreshed positions that no longer have any deal
+    stale = {"account": account_id, "refreshed_at": {"$lt": refreshed_at}}
+    if position_ids is not None:
+        stale["position_id"] = {"$in": position_ids}
+    operations.append(DeleteMany(stale))
+
+    Trades._get_collection().bulk_write(operations, ordered=True)
+
+
+def refresh_positions(account_id: int, position_ids: Iterable[int]):
+    """Rebuild the trades of the given positions from all of their deals.
+
+    Args:
+        account_id: The account id
+        position_ids: Position ids of the new or changed deals
+    """
+    position_ids = sorted({position_id for position_id in position_ids if position_id})
+    for batch in split_by_n(position_ids, settings.JOURNALS_BULK_BATCH_SIZE):
+        _write(account_id, {"account": account_id, "position_id": {"$in": batch}}, batch)
+
+
+def rebuild(account_id: int):
+    """Regenerate every trade of an account from its raw deals."""
+    _write(account_id, {"account": account_id})
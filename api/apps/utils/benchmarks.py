@@ -0,0 +1,106 @@
+"""Generated data and timing helpers of the benchmark commands and tests."""
+
+import random
+import time
+
+import numpy as np
+
+from apps.accounts.bars import RATES_DTYPE
+
+SYMBOLS = ("EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "US30")
+INSERT_BATCH_SIZE = 10000
+
+
+def timed(function, repeat: int):
+    """Run ``function`` ``repeat`` times.
+
+    Returns:
+        tuple: The fastest run in seconds and the result of the last run
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def insert(document, rows):
+    """Insert the raw ``rows`` into the collection of ``document`` in batches of INSERT_BATCH_SIZE."""
+    collection = document._get_collection()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def deals(account_id: int, count: int, date_to: int):
+    """Yield ``count`` history deals of the year before ``date_to``, entries and exits of the same positions.
+
+    The deals are seeded with ``account_id``, so a scratch account always gets the same ones.
+    """
+    rng = random.Random(account_id)
+    for ticket in range(count):
+        yield {
+            "account": account_id,
+            "ticket": ticket,
+            "order": ticket,
+            "position_id": ticket // 2,
+            "time": date_to - rng.randint(0, 365 * 86400),
+            "entry": ticket % 2,
+            "type": rng.randint(0, 1),
+            "reason": rng.randint(0, 2),
+            "magic": 0,
+            "symbol": rng.choice(SYMBOLS),
+            "volume": rng.choice((0.01, 0.1, 1.0)),
+            "price": rng.uniform(1, 2000),
+            "commission": 0.0,
+            "swap": 0.0,
+            "fee": 0.0,
+            "profit": rng.uniform(-100, 100) if ticket % 2 else 0.0,
+            "comment": "",
+            "external_id": "",
+        }
+
+
+def trades(account_id: int, count: int):
+    """Yield ``count`` closed trades, one to two minutes apart up to now, seeded with ``account_id``."""
+    rng = random.Random(account_id)
+    exit_time = int(time.time()) - count * 60
+    for position_id in range(1, count + 1):
+        exit_time += rng.randint(1, 120)
+        net_profit = rng.uniform(-100, 110)
+        yield {
+            "account": account_id,
+            "position_id": position_id,
+            "symbol": rng.choice(SYMBOLS),
+            "closed": True,
+            "entry_time": exit_time - 60,
+            "exit_time": exit_time,
+            "net_profit": net_profit,
+            "profit": net_profit,
+        }
+
+
+def rates(count: int, flat: bool = False) -> np.ndarray:
+    """Deterministic M1 bars shaped like ``copy_rates_*`` results, a random walk around 1.1.
+
+    Args:
+        count (int): Number of bars
+        flat (bool): Whether every bar has the same open, high, low and close
+    """
+    rng = np.random.default_rng(0)
+    close = np.full(count, 1.1) if flat else 1.1 + np.cumsum(rng.normal(0, 0.0001, count))
+    bars = np.zeros(count, dtype=RATES_DTYPE)
+    bars['time'] = 1700000000 + 60 * np.arange(count)
+    bars['open'] = np.concatenate((close[:1], close[:-1]))
+    bars['close'] = close
+    bars['high'] = np.maximum(bars['open'], close) + (0 if flat else rng.uniform(0, 0.0003, count))
+    bars['low'] = np.minimum(bars['open'], close) - (0 if flat else rng.uniform(0, 0.0003, count))
+    bars['tick_volume'] = rng.integers(1, 200, count)
+    bars['spread'] = 12
+    return bars
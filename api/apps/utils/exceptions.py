@@ -149,6 +149,15 @@ class PreconditionError(BadRequest):
     default_detail = _("Precondition error")
 
 
+class GatewayTimeout(BaseException):
+    """
+    Exception used when an upstream service, like
+    an MT5 terminal, does not answer in time.
+    """
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = _("The trading terminal did not answer in time")
+
+
 class Blocked(APIException):
     """
     Exception used on blocked accounts
@@ -1,7 +1,133 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.cache import cache
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size = 10  # Set the number of items per page
     page_size_query_param = 'itemPerPage'
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination for mongoengine querysets over a compound sort key such as ``(-time, -ticket)``.
+
+    Pages are fetched with a range filter on the key, served by the matching index, instead of ``skip(n)``.
+    The cursor is an opaque token holding the boundary key and the paging direction. The total count is
+    optional (``count=false`` skips it) and cached for ``count_cache_timeout`` seconds.
+    """
+    page_size = 10
+    page_size_query_param = 'itemPerPage'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    count_cache_timeout = 60
+
+    def __init__(self, ordering=("-time", "-ticket")):
+        self.ordering = ordering
+        self.fields = [field.lstrip("-") for field in ordering]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, values, reverse=False):
+        data = json.dumps({"v": values, "r": reverse}).encode()
+        return urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()))
+            values, reverse = data["v"], bool(data["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise NotFound("Invalid cursor")
+        return values, reverse
+
+    def _key(self, item):
+        if isinstance(item, dict):
+            return [item.get(field) for field in self.fields]
+        return [getattr(item, field) for field in self.fields]
+
+    def _after(self, values, reverse):
+        """Raw filter selecting the items strictly after ``values`` in the paging direction."""
+        clauses = []
+        for position, field in enumerate(self.fields):
+            descending = self.ordering[position].startswith("-")
+            operator = "$lt" if descending != reverse else "$gt"
+            clause = {previous: values[index] for index, previous in enumerate(self.fields[:position])}
+            clause[field] = {operator: values[position]}
+            clauses.append(clause)
+        return {"$or": clauses}
+
+    def _ordering(self, reverse):
+        if not reverse:
+            return self.ordering
+        return [field[1:] if field.startswith("-") else "-" + field for field in self.ordering]
+
+    def get_count(self, queryset):
+        key = json.dumps([queryset._document._get_collection_name(), queryset._query], default=str, sort_keys=True)
+        key = "keyset-count:{}".format(hashlib.md5(key.encode()).hexdigest())
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param, "true").lower() not in ("false", "0"):
+            self.count = self.get_count(queryset)
+
+        page = queryset
+        if values is not None:
+            page = page.filter(__raw__=self._after(values, reverse))
+        items = list(page.order_by(*self._ordering(reverse)).limit(page_size + 1))
+
+        has_more = len(items) > page_size
+        items = items[:page_size]
+        if reverse:
+            items.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.first_key = self._key(items[0]) if items else values
+        self.last_key = self._key(items[-1]) if items else values
+        return items
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.last_key))
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.first_key, reverse=True))
+
+    def get_paginated_data(self, results):
+        return {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': results
+        }
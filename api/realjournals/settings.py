@@ -646,6 +646,30 @@ DEFAULT_ACCOUNT_TEMPLATE = "default"
 
 MT5_HOST = config('MT5_HOST', default='mt5')
 MT5_PORT = config('MT5_PORT', default=18812)
+MT5_TERMINALS = config('MT5_TERMINALS', default='')  # comma separated host:port, MT5_HOST:MT5_PORT when empty
+MT5_HASH_REPLICAS = config('MT5_HASH_REPLICAS', default=100, cast=int)  # ring points per terminal
+MT5_POOL_TIMEOUT = config('MT5_POOL_TIMEOUT', default=30, cast=int)  # In seconds
+MT5_POOL_HEALTHCHECK_INTERVAL = config('MT5_POOL_HEALTHCHECK_INTERVAL', default=30, cast=int)  # In seconds
+MT5_SYNC_RETRY_DELAY = config('MT5_SYNC_RETRY_DELAY', default=15, cast=int)  # In seconds
+MT5_SYNC_MAX_RETRIES = config('MT5_SYNC_MAX_RETRIES', default=4, cast=int)  # while the account terminal is busy
+MT5_SYNC_OVERLAP = config('MT5_SYNC_OVERLAP', default=300, cast=int)  # In seconds, history refetched before the watermark
+MT5_BACKFILL_WINDOW_DAYS = config('MT5_BACKFILL_WINDOW_DAYS', default=30, cast=int)  # history fetched per MT5 call
+MT5_SYNC_MIN_INTERVAL = config('MT5_SYNC_MIN_INTERVAL', default=60, cast=int)  # In seconds, active accounts
+MT5_SYNC_MAX_INTERVAL = config('MT5_SYNC_MAX_INTERVAL', default=6*60*60, cast=int)  # In seconds, idle accounts
+MT5_SYNC_BACKOFF = config('MT5_SYNC_BACKOFF', default=2, cast=float)  # interval factor after an idle sync
+MT5_BREAKER_THRESHOLD = config('MT5_BREAKER_THRESHOLD', default=3, cast=int)  # consecutive failures per server/terminal
+MT5_BREAKER_COOLDOWN = config('MT5_BREAKER_COOLDOWN', default=300, cast=int)  # In seconds, before a half-open probe
+MT5_CALL_TIMEOUT = config('MT5_CALL_TIMEOUT', default=60, cast=int)  # In seconds, per async MT5 call
+MT5_ASYNC_WORKERS = config('MT5_ASYNC_WORKERS', default=32, cast=int)  # threads running async MT5 calls
+MT5_SYNC_BATCH_SIZE = config('MT5_SYNC_BATCH_SIZE', default=20, cast=int)  # accounts synced per task
+MT5_SYNC_TIMEOUT = config('MT5_SYNC_TIMEOUT', default=600, cast=int)  # In seconds, per account of a batch
+MT5_BAR_CACHE = config('MT5_BAR_CACHE', default=True, cast=bool)  # serve closed bars from local disk
+MT5_BAR_CACHE_DIR = config('MT5_BAR_CACHE_DIR', default=os.path.join(BASE_DIR, 'bar_cache'))
+MT5_BAR_CACHE_MAX_AGE = config('MT5_BAR_CACHE_MAX_AGE', default=30*24*60*60, cast=int)  # In seconds since last read
+MT5_BAR_CACHE_MAX_SIZE = config('MT5_BAR_CACHE_MAX_SIZE', default=5*1024, cast=int)  # In MB
+MT5_BAR_CACHE_EVICT_INTERVAL = config('MT5_BAR_CACHE_EVICT_INTERVAL', default=60*60, cast=int)  # In seconds, per host
+
+JOURNALS_BULK_BATCH_SIZE = config('JOURNALS_BULK_BATCH_SIZE', default=5000, cast=int)  # operations per bulk_write round-trip
 
 REDIS_HOST = config('MT5_HOST', default='redis')
 REDIS_PORT = config('MT5_PORT', default=6379)
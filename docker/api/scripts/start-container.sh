@@ -8,6 +8,10 @@ echo Executing pending migrations
 python3 -m pip install -r requirements.txt
 python3 manage.py makemigrations
 python3 manage.py migrate
+# Create or verify the journal indexes, never keep the container from starting over them
+if ! python3 manage.py ensure_journal_indexes; then
+    echo "Could not ensure the journal indexes, starting without them" >&2
+fi
 
 # Load default templates
 echo Load default templates